@@ -1,5 +1,9 @@
 import numpy as np
-from numba import jitclass, i8
+from numba import i8
+try:
+    from numba.experimental import jitclass
+except ImportError:  # numba < 0.49
+    from numba import jitclass
 
 
 class BIT:
@@ -0,0 +1,305 @@
+"""
+数論変換(NTT)による畳み込みのライブラリ。
+    convolve_ntt    : NTT-friendlyな素数(998244353など)でのO(nlogn)の畳み込み
+    convolve_mod    : 任意mod(< 2^31)での畳み込み。NTT-friendlyでなければ3素数NTT+Garnerで復元する
+    convolve_int64  : modを取らない整数係数の畳み込み。結果の絶対値が2^62未満なら3素数NTTで厳密に求まる
+    convolve_bigint : 係数が巨大な場合のKronecker置換による畳み込み（CPythonの多倍長乗算に任せる）
+    convolve        : 上記をmodや係数の大きさに応じて使い分けるPythonのリスト向けの窓口
+参考：https://github.com/atcoder/ac-library/blob/master/atcoder/convolution.hpp
+"""
+import numpy as np
+from numba import njit
+
+
+# 3素数NTTで使う素数（いずれも2^24以上の2べきで割り切れる）
+MOD1, MOD2, MOD3 = 754974721, 167772161, 469762049
+# MOD1 * MOD2 * MOD3 を2^64で割った余り（符号付き64bit整数に直したもの）
+_M123_WRAP = (MOD1 * MOD2 * MOD3 + (1 << 63)) % (1 << 64) - (1 << 63)
+# MOD1 * MOD2 * MOD3（int64に収まらないので、Garnerで復元できるかの判定用に浮動小数点数で持つ）
+_M123_FLOAT = float(MOD1 * MOD2 * MOD3)
+# 3つの素数はいずれも2^24で割り切れるので、3素数NTTで扱える長さはここまで
+MAX_THREE_PRIMES_LEN = 1 << 24
+# これ以下の長さの畳み込みは愚直に計算した方が速い
+NAIVE_THRESHOLD = 60
+
+
+@njit("i8(i8,i8,i8)", cache=True)
+def pow_mod(a, n, mod):
+    """a^n mod modを繰り返し二乗法で求める。mod < 2^31が前提"""
+    a %= mod
+    ret = 1
+    while n > 0:
+        if n & 1:
+            ret = ret * a % mod
+        a = a * a % mod
+        n >>= 1
+    return ret
+
+
+@njit("b1(i8)", cache=True)
+def is_prime(n):
+    """Miller-Rabin素数判定。n < 2^31では底2, 3, 5, 7で決定的になる"""
+    assert n < (1 << 31)
+    if n < 2:
+        return False
+    for p in (2, 3, 5, 7):
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in (2, 3, 5, 7):
+        x = pow_mod(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+@njit("i8(i8,i8)", cache=True)
+def ntt_primitive_root(mod, size):
+    """
+    modが素数かつ(mod - 1)がsizeで割り切れるなら原始根を返し、そうでなければ0を返す。
+    すなわち長さsizeのNTTがmod上で実行可能かどうかの判定も兼ねている。
+    mod - 1の素因数分解は試し割りだが、NTT-friendlyな素数なら2べきを除いた残りが小さいのですぐ終わる。
+    """
+    if mod < 3 or (mod - 1) % size != 0 or not is_prime(mod):
+        return 0
+    # mod - 1の素因数を列挙して、全てのqについてg^((mod-1)/q) != 1なるgを探す
+    factors = np.zeros(32, dtype=np.int64)
+    num = 0
+    x = mod - 1
+    p = 2
+    while p * p <= x:
+        if x % p == 0:
+            factors[num] = p
+            num += 1
+            while x % p == 0:
+                x //= p
+        p += 1
+    if x > 1:
+        factors[num] = x
+        num += 1
+    g = 2
+    while True:
+        ok = True
+        for k in range(num):
+            if pow_mod(g, (mod - 1) // factors[k], mod) == 1:
+                ok = False
+                break
+        if ok:
+            return g
+        g += 1
+
+
+@njit(cache=True)
+def ntt(a, mod, g, inverse):
+    """
+    長さが2べきの配列aをその場でNTT(inverse=Trueなら逆変換)する。
+    逆変換では1/nを掛けるところまで行う。
+    """
+    n = a.shape[0]
+    # ビット反転順に並べ替える
+    j = 0
+    for i in range(1, n):
+        bit = n >> 1
+        while j & bit:
+            j ^= bit
+            bit >>= 1
+        j ^= bit
+        if i < j:
+            a[i], a[j] = a[j], a[i]
+    length = 2
+    while length <= n:
+        half = length >> 1
+        w = pow_mod(g, (mod - 1) // length, mod)
+        if inverse:
+            w = pow_mod(w, mod - 2, mod)
+        ws = np.empty(half, dtype=np.int64)
+        ws[0] = 1
+        for k in range(1, half):
+            ws[k] = ws[k - 1] * w % mod
+        for i in range(0, n, length):
+            for k in range(half):
+                u = a[i + k]
+                v = a[i + k + half] * ws[k] % mod
+                a[i + k] = u + v - mod if u + v >= mod else u + v
+                a[i + k + half] = u - v if u >= v else u - v + mod
+        length <<= 1
+    if inverse:
+        inv_n = pow_mod(n, mod - 2, mod)
+        for i in range(n):
+            a[i] = a[i] * inv_n % mod
+
+
+@njit(cache=True)
+def _convolve_naive(a, b, mod):
+    n, m = a.shape[0], b.shape[0]
+    ret = np.zeros(n + m - 1, dtype=np.int64)
+    for i in range(n):
+        if a[i] == 0:
+            continue
+        for j in range(m):
+            ret[i + j] = (ret[i + j] + a[i] * b[j]) % mod
+    return ret
+
+
+@njit(cache=True)
+def convolve_ntt(a, b, mod, g):
+    """
+    NTT-friendlyな素数mod（原始根g）上でaとbの畳み込みをO(nlogn)で求める。
+    a, bの要素は負でもよい（内部でmodを取る）。
+    """
+    n, m = a.shape[0], b.shape[0]
+    if n == 0 or m == 0:
+        return np.zeros(0, dtype=np.int64)
+    if min(n, m) <= NAIVE_THRESHOLD:
+        return _convolve_naive(a % mod, b % mod, mod)
+    size = 1
+    while size < n + m - 1:
+        size <<= 1
+    fa = np.zeros(size, dtype=np.int64)
+    fb = np.zeros(size, dtype=np.int64)
+    for i in range(n):
+        fa[i] = a[i] % mod
+    for i in range(m):
+        fb[i] = b[i] % mod
+    ntt(fa, mod, g, False)
+    ntt(fb, mod, g, False)
+    for i in range(size):
+        fa[i] = fa[i] * fb[i] % mod
+    ntt(fa, mod, g, True)
+    return fa[:n + m - 1]
+
+
+@njit(cache=True)
+def _convolve_three_primes(a, b):
+    """3つのNTT-friendlyな素数それぞれで畳み込んだ結果を返す"""
+    assert a.shape[0] + b.shape[0] - 1 <= MAX_THREE_PRIMES_LEN, "too long for the three NTT primes"
+    c1 = convolve_ntt(a, b, MOD1, 11)
+    c2 = convolve_ntt(a, b, MOD2, 3)
+    c3 = convolve_ntt(a, b, MOD3, 3)
+    return c1, c2, c3
+
+
+@njit(cache=True)
+def convolve_mod(a, b, mod):
+    """
+    任意のmod(< 2^31)上でaとbの畳み込みをO(nlogn)で求める。
+    modがNTT-friendlyな素数ならNTT1回で済ませ、そうでなければ3素数NTTの結果から
+    Garnerのアルゴリズムで復元する。真の係数は最大で(len(a) + len(b)) * mod^2なので、
+    これがMOD1 * MOD2 * MOD3未満のときだけ一意に復元できる（modが2^31に近ければ長さの合計が1.2 * 10^7程度まで）。
+    """
+    assert 1 <= mod < (1 << 31)
+    n, m = a.shape[0], b.shape[0]
+    if n == 0 or m == 0:
+        return np.zeros(0, dtype=np.int64)
+    if min(n, m) <= NAIVE_THRESHOLD:
+        return _convolve_naive(a % mod, b % mod, mod)
+    size = 1
+    while size < n + m - 1:
+        size <<= 1
+    g = ntt_primitive_root(mod, size)
+    if g > 0:
+        return convolve_ntt(a, b, mod, g)
+
+    assert (n + m) * float(mod) * float(mod) < _M123_FLOAT, "coefficients may exceed MOD1 * MOD2 * MOD3"
+    c1, c2, c3 = _convolve_three_primes(a % mod, b % mod)
+    m1_inv_m2 = pow_mod(MOD1, MOD2 - 2, MOD2)
+    m12_inv_m3 = pow_mod(MOD1 * MOD2 % MOD3, MOD3 - 2, MOD3)
+    m12 = MOD1 * MOD2 % mod
+    ret = np.empty(n + m - 1, dtype=np.int64)
+    for i in range(n + m - 1):
+        x1 = c1[i]
+        t2 = (c2[i] - x1) % MOD2 * m1_inv_m2 % MOD2
+        x2 = x1 + MOD1 * t2  # < MOD1 * MOD2 < 2^57
+        t3 = (c3[i] - x2) % MOD3 * m12_inv_m3 % MOD3
+        ret[i] = (x2 % mod + m12 * t3) % mod
+    return ret
+
+
+@njit(cache=True)
+def convolve_int64(a, b):
+    """
+    modを取らずにaとbの畳み込みを厳密に求める。
+    結果の各係数の絶対値が2^62未満であることが前提（呼び出し側で確認すること）。
+    3素数NTT+Garnerで MOD1 * MOD2 * MOD3 を法とした値を求め、
+    64bitの桁あふれを許したまま計算すれば真の値が符号付きで得られる。
+    """
+    n, m = a.shape[0], b.shape[0]
+    if n == 0 or m == 0:
+        return np.zeros(0, dtype=np.int64)
+    if min(n, m) <= NAIVE_THRESHOLD:
+        ret = np.zeros(n + m - 1, dtype=np.int64)
+        for i in range(n):
+            for j in range(m):
+                ret[i + j] += a[i] * b[j]
+        return ret
+
+    c1, c2, c3 = _convolve_three_primes(a, b)
+    m1_inv_m2 = pow_mod(MOD1, MOD2 - 2, MOD2)
+    m12_inv_m3 = pow_mod(MOD1 * MOD2 % MOD3, MOD3 - 2, MOD3)
+    m12 = MOD1 * MOD2
+    ret = np.empty(n + m - 1, dtype=np.int64)
+    for i in range(n + m - 1):
+        x1 = c1[i]
+        t2 = (c2[i] - x1) % MOD2 * m1_inv_m2 % MOD2
+        x2 = x1 + MOD1 * t2
+        t3 = (c3[i] - x2) % MOD3 * m12_inv_m3 % MOD3
+        # 真の値が負なら代表元は MOD1 * MOD2 * MOD3 に近い側にある
+        val = x2 + m12 * t3
+        if t3 > MOD3 // 2:
+            val -= _M123_WRAP
+        ret[i] = val
+    return ret
+
+
+def convolve_bigint(A, B):
+    """
+    多倍長整数係数の多項式A, Bの積を厳密に求める（Kronecker置換）。
+    係数を十分な幅のビット列に詰めて1つの整数にし、CPythonの多倍長乗算に任せてからバラす。
+    負の係数は全桁にバイアス2^(w-1)を足すことで扱う。
+    """
+    if not A or not B:
+        return []
+    n = len(A) + len(B) - 1
+    bound = max(abs(x) for x in A) * max(abs(x) for x in B) * min(len(A), len(B))
+    if bound == 0:
+        return [0] * n
+    nbytes = (bound.bit_length() + 8) // 8  # |係数| < 2^(w-1)となる最小の8の倍数w
+
+    def pack(P):
+        pos = b''.join((x if x > 0 else 0).to_bytes(nbytes, 'little') for x in P)
+        neg = b''.join((-x if x < 0 else 0).to_bytes(nbytes, 'little') for x in P)
+        return int.from_bytes(pos, 'little') - int.from_bytes(neg, 'little')
+
+    bias = 1 << (nbytes * 8 - 1)
+    biases = int.from_bytes(bias.to_bytes(nbytes, 'little') * n, 'little')
+    Z = (pack(A) * pack(B) + biases).to_bytes(nbytes * n, 'little')
+    return [int.from_bytes(Z[i:i + nbytes], 'little') - bias for i in range(0, nbytes * n, nbytes)]
+
+
+def convolve(A, B, mod=None):
+    """
+    多項式A, B（係数のリスト）の積を係数のリストで返す。
+    mod=Noneなら整数のまま厳密に計算する。
+    係数が64bitに収まるなら3素数NTT、そうでなければKronecker置換を用いる。
+    """
+    if not A or not B:
+        return []
+    if mod is None:
+        bound = max(abs(x) for x in A) * max(abs(x) for x in B) * min(len(A), len(B))
+        if bound < (1 << 62):
+            return convolve_int64(np.array(A, dtype=np.int64), np.array(B, dtype=np.int64)).tolist()
+        return convolve_bigint(A, B)
+    A = [x % mod for x in A]
+    B = [x % mod for x in B]
+    if mod < (1 << 31):
+        return convolve_mod(np.array(A, dtype=np.int64), np.array(B, dtype=np.int64), mod).tolist()
+    return [x % mod for x in convolve_bigint(A, B)]
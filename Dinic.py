@@ -1,5 +1,11 @@
 from collections import deque
 
+import numpy as np
+from numba import njit
+
+from Graph import CSRGraph
+
+
 class Dinic:
     """
     Dinic法による最大フローを求めるコード
@@ -17,12 +23,23 @@ class Dinic:
 
     またここでは実装してないが、より高速なアルゴリズムが存在するらしい：
     "A New Approach to the Maximum-Flow Problem [Goldberg and Tarjin 1988]"
+
+    nの代わりに重み付きのGraph.CSRGraphを渡すと、重みを容量として全ての辺を張る。
+    dfsが再帰なので、大きなグラフには配列ベースのNumbaDinicを使うこと。
     """
     def __init__(self, n):
+        graph = None
+        if isinstance(n, CSRGraph):
+            graph, n = n, n.n
         self.n = n
         self.links = [[] for _ in range(n)]
         self.depth = None
         self.progress = None
+        if graph is not None:
+            us, vs, ws = graph.edges()
+            assert ws is not None, "edge weights are required"
+            for u, v, w in zip(us.tolist(), vs.tolist(), ws.tolist()):
+                self.add_link(u, v, w)
  
     def add_link(self, _from, to, cap, directed=True):
         self.links[_from].append([cap, to, len(self.links[to])])
@@ -70,4 +87,292 @@ class Dinic:
             current_flow = self.dfs(s, t, float('inf'))
             while current_flow > 0:
                 flow += current_flow
-                current_flow = self.dfs(s, t, float('inf'))
\ No newline at end of file
+                current_flow = self.dfs(s, t, float('inf'))
+
+INF = 1 << 62
+
+
+@njit(cache=True)
+def _build_arcs(n, fr, to, cap, rcap):
+    """
+    辺k: fr[k] -> to[k]（残余容量cap[k]、逆辺の残余容量rcap[k]）を計数ソートでCSR順の弧の配列にする。
+    pos[k]は辺kの順方向の弧の位置で、逆向きの弧はrev[pos[k]]にある。
+    """
+    m = fr.shape[0]
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    for k in range(m):
+        offsets[fr[k] + 1] += 1
+        offsets[to[k] + 1] += 1
+    for v in range(n):
+        offsets[v + 1] += offsets[v]
+    fill = offsets[:-1].copy()
+    arc_to = np.empty(2 * m, dtype=np.int64)
+    arc_cap = np.empty(2 * m, dtype=np.int64)
+    arc_rev = np.empty(2 * m, dtype=np.int64)
+    pos = np.empty(m, dtype=np.int64)
+    for k in range(m):
+        u, v = fr[k], to[k]
+        i = fill[u]
+        fill[u] += 1
+        j = fill[v]
+        fill[v] += 1
+        arc_to[i], arc_cap[i], arc_rev[i] = v, cap[k], j
+        arc_to[j], arc_cap[j], arc_rev[j] = u, rcap[k], i
+        pos[k] = i
+    return offsets, arc_to, arc_cap, arc_rev, pos
+
+
+@njit(cache=True)
+def _bfs_level(offsets, to, cap, s, level, queue):
+    """残余グラフでsからのBFS距離をlevelに書き込む（到達不能なら-1）"""
+    level[:] = -1
+    level[s] = 0
+    queue[0] = s
+    head, tail = 0, 1
+    while head < tail:
+        v = queue[head]
+        head += 1
+        for e in range(offsets[v], offsets[v + 1]):
+            w = to[e]
+            if cap[e] > 0 and level[w] < 0:
+                level[w] = level[v] + 1
+                queue[tail] = w
+                tail += 1
+
+
+@njit(cache=True)
+def _blocking_flow(offsets, to, cap, rev, level, it, path, s, t, limit):
+    """
+    レベルグラフ上の増加路をcurrent-arc(it)を進めながら非再帰のDFSで探し、limitを上限に流す。
+    増加路に流した後は最初に飽和した辺の手前まで戻って探索を続ける。
+    """
+    flow = 0
+    top = 0
+    v = s
+    while flow < limit:
+        if v == t:
+            f = limit - flow
+            for k in range(top):
+                f = min(f, cap[path[k]])
+            first = top
+            for k in range(top):
+                e = path[k]
+                cap[e] -= f
+                cap[rev[e]] += f
+                if cap[e] == 0 and first == top:
+                    first = k
+            flow += f
+            top = first
+            v = s if top == 0 else to[path[top - 1]]
+            continue
+        end = offsets[v + 1]
+        while it[v] < end:
+            e = it[v]
+            if cap[e] > 0 and level[to[e]] == level[v] + 1:
+                break
+            it[v] += 1
+        if it[v] < end:
+            path[top] = it[v]
+            top += 1
+            v = to[it[v]]
+        else:
+            if top == 0:
+                break
+            level[v] = -1  # 行き止まりなので以降は訪れない
+            top -= 1
+            v = to[rev[path[top]]]
+            it[v] += 1
+    return flow
+
+
+@njit(cache=True)
+def _dinic(offsets, to, cap, rev, s, t, limit):
+    n = offsets.shape[0] - 1
+    level = np.empty(n, dtype=np.int64)
+    queue = np.empty(n, dtype=np.int64)
+    it = np.empty(n, dtype=np.int64)
+    path = np.empty(n, dtype=np.int64)
+    flow = 0
+    while flow < limit:
+        _bfs_level(offsets, to, cap, s, level, queue)
+        if level[t] < 0:
+            break
+        it[:] = offsets[:-1]
+        f = _blocking_flow(offsets, to, cap, rev, level, it, path, s, t, limit - flow)
+        if f == 0:
+            break
+        flow += f
+    return flow
+
+
+@njit(cache=True)
+def _add_capacity(cap, rev, pos, cap0, rcap0, directed, ks, deltas):
+    for i in range(ks.shape[0]):
+        k, d = ks[i], deltas[i]
+        e = pos[k]
+        assert cap[e] + d >= 0, "capacity cannot be decreased below the current flow"
+        if not directed[k]:  # 無向辺は逆向きの容量も増やす
+            assert cap[rev[e]] + d >= 0, "capacity cannot be decreased below the current flow"
+            cap[rev[e]] += d
+            rcap0[k] += d
+        cap[e] += d
+        cap0[k] += d
+
+
+@njit(cache=True)
+def _reset_flow(cap, rev, pos, cap0, rcap0):
+    for k in range(pos.shape[0]):
+        cap[pos[k]] = cap0[k]
+        cap[rev[pos[k]]] = rcap0[k]
+
+
+@njit(cache=True)
+def _residual_reachable(offsets, to, cap, s):
+    n = offsets.shape[0] - 1
+    level = np.empty(n, dtype=np.int64)
+    queue = np.empty(n, dtype=np.int64)
+    _bfs_level(offsets, to, cap, s, level, queue)
+    return level >= 0
+
+
+class NumbaDinic:
+    """
+    Dinicの辺を[cap, to, rev]のリストではなくCSR順に並べたnp.int64の配列(to, cap, rev)で持つ版。
+    BFSもブロッキングフローのDFSもnjitで非再帰に書いてあるので、
+    レベルグラフが長くてもスタックが溢れず、10^5頂点・10^6辺程度でも現実的な時間で動く。
+    add_linkで溜めた辺はmax_flowの呼び出し時にまとめてCSRにする。
+    max_flowは残余グラフを引き継ぐので、解いた後に辺や容量を足してもう一度呼ぶと
+    増えた分の増加路だけを探して、増えた流量を返す（辺を足した場合はCSRを作り直すがO(n + m)で済む）。
+    使用例：
+        mf = NumbaDinic(6)
+        e = mf.add_link(0, 1, 10)     # 辺番号が返る
+        mf.add_links(us, vs, caps)    # まとめて追加（いずれも配列）
+        print(mf.max_flow(0, 5))
+        print(mf.min_cut(0))          # 最小カットのs側の頂点ならTrue
+        print(mf.edge_flow(e))
+        mf.add_capacity(e, 5)         # 容量を増やして続きから解く
+        print(mf.max_flow(0, 5))      # 増えた流量
+        mf.reset_flow()               # 流量0に戻す
+    """
+    def __init__(self, n):
+        graph = None
+        if isinstance(n, CSRGraph):
+            graph, n = n, n.n
+        self.n = n
+        self.m = 0
+        empty = np.zeros(0, dtype=np.int64)
+        # 辺kの始点・終点・元の容量・元の逆辺の容量・有向辺かどうか（辺番号順）
+        self.fr, self.dst, self.cap0, self.rcap0 = empty, empty, empty, empty
+        self.directed = np.zeros(0, dtype=np.bool_)
+        # CSR順の弧の配列（未構築ならNone）
+        self.offsets = self.to = self.cap = self.rev = self.pos = None
+        self._chunks = []
+        self._single = ([], [], [], [], [])
+        if graph is not None:
+            us, vs, ws = graph.edges()
+            assert ws is not None, "edge weights are required"
+            self.add_links(us, vs, ws)
+
+    def add_link(self, _from, to, cap, directed=True):
+        """辺を追加して辺番号を返す。directed=Falseなら逆向きにも容量capを持たせる"""
+        fr, dst, caps, rcaps, dirs = self._single
+        fr.append(_from)
+        dst.append(to)
+        caps.append(cap)
+        rcaps.append(0 if directed else cap)
+        dirs.append(directed)
+        self.m += 1
+        return self.m - 1
+
+    def add_links(self, froms, tos, caps, directed=True):
+        """辺をまとめて追加して、最初の辺番号を返す"""
+        self._flush_single()
+        froms = np.asarray(froms, dtype=np.int64)
+        tos = np.asarray(tos, dtype=np.int64)
+        caps = np.asarray(caps, dtype=np.int64)
+        assert froms.shape == tos.shape == caps.shape
+        rcaps = np.zeros_like(caps) if directed else caps.copy()
+        dirs = np.full(caps.shape, directed, dtype=np.int64)
+        self._chunks.append((froms, tos, caps, rcaps, dirs))
+        first = self.m
+        self.m += froms.shape[0]
+        return first
+
+    def _flush_single(self):
+        if self._single[0]:
+            self._chunks.append(tuple(np.array(a, dtype=np.int64) for a in self._single))
+            self._single = ([], [], [], [], [])
+
+    def _build(self):
+        """追加された辺をCSRに組み込む。既存の辺は今の残余容量を引き継ぐ"""
+        self._flush_single()
+        if not self._chunks:
+            return
+        fr, dst, caps, rcaps, dirs = (np.concatenate(arrs) for arrs in zip(*self._chunks))
+        self._chunks = []
+        if self.offsets is not None:
+            res = self.cap[self.pos]
+            rres = self.cap[self.rev[self.pos]]
+        else:
+            res = rres = np.zeros(0, dtype=np.int64)
+        self.fr = np.concatenate((self.fr, fr))
+        self.dst = np.concatenate((self.dst, dst))
+        self.cap0 = np.concatenate((self.cap0, caps))
+        self.rcap0 = np.concatenate((self.rcap0, rcaps))
+        self.directed = np.concatenate((self.directed, dirs.astype(np.bool_)))
+        self.offsets, self.to, self.cap, self.rev, self.pos = _build_arcs(
+            self.n, self.fr, self.dst, np.concatenate((res, caps)), np.concatenate((rres, rcaps)))
+
+    def max_flow(self, s, t, flow_limit=INF):
+        """sからtへflow_limitを上限に流せるだけ流し、その流量を返す"""
+        self._build()
+        if self.offsets is None or s == t:
+            return 0
+        return int(_dinic(self.offsets, self.to, self.cap, self.rev, s, t, flow_limit))
+
+    def min_cut(self, s):
+        """
+        max_flowの後に呼ぶと、残余グラフでsから到達できる頂点をTrueとしたnp.bool_の配列を返す。
+        Trueの頂点からFalseの頂点への辺の集合が最小カットになる。
+        """
+        self._build()
+        if self.offsets is None:
+            ret = np.zeros(self.n, dtype=np.bool_)
+            ret[s] = True
+            return ret
+        return _residual_reachable(self.offsets, self.to, self.cap, s)
+
+    def min_cut_edges(self, s):
+        """最小カットを構成する辺の辺番号の配列を返す"""
+        side = self.min_cut(s)
+        a, b = side[self.fr], side[self.dst]
+        return np.flatnonzero((a & ~b) | (~self.directed & b & ~a))
+
+    def edge_flow(self, k=None):
+        """辺kに流れている流量を返す。kを省略すると全ての辺の流量の配列を返す"""
+        self._build()
+        if self.offsets is None:
+            return np.zeros(0, dtype=np.int64)
+        flows = self.cap0 - self.cap[self.pos]
+        return flows if k is None else int(flows[k])
+
+    def add_capacity(self, k, delta):
+        """
+        辺kの容量をdeltaだけ増やす。次のmax_flowは今の流量の続きから流す。
+        今流れている流量を下回らなければdelta < 0でもよい。無向辺は両向きの容量が変わる。
+        """
+        self.add_capacities(np.array([k]), np.array([delta]))
+
+    def add_capacities(self, ks, deltas):
+        """辺ks[i]の容量をdeltas[i]だけ増やす"""
+        self._build()
+        ks = np.asarray(ks, dtype=np.int64)
+        deltas = np.asarray(deltas, dtype=np.int64)
+        assert ks.shape == deltas.shape
+        _add_capacity(self.cap, self.rev, self.pos, self.cap0, self.rcap0, self.directed, ks, deltas)
+
+    def reset_flow(self):
+        """全ての辺の流量を0に戻す。配列はそのまま使い回す"""
+        self._build()
+        if self.offsets is not None:
+            _reset_flow(self.cap, self.rev, self.pos, self.cap0, self.rcap0)
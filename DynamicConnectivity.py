@@ -0,0 +1,171 @@
+"""
+辺の追加・削除と連結性の質問が混ざったクエリ列をオフラインで処理するライブラリ。
+各辺が存在する時刻の区間[l, r)を求め、時刻の上のセグメント木のO(logQ)個のノードに載せておく。
+セグメント木をDFSしながら、ノードに入るときにその辺を全てUnionFindTree.RollbackUnionFindで繋ぎ、
+出るときにrollbackで元に戻すと、葉（時刻t）に着いたときには時刻tに存在する辺だけが繋がっている。
+計算量はO((N + Q)logQlogN)。質問のない部分木には下りない。
+クエリはtypes[t]（ADD, REMOVE, SAME, COUNTのいずれか）とus[t], vs[t]の配列で与える。
+    ADD   : 辺u-vを追加する（多重辺も可）
+    REMOVE: 辺u-vを1本削除する（存在すること）
+    SAME  : uとvが連結なら1、そうでなければ0を答える
+    COUNT : 連結成分の個数を答える（u, vは使わない）
+使用例：
+    ans = offline_dynamic_connectivity(n, types, us, vs)    # SAME/COUNTの答えをクエリの順に並べたもの
+参考：https://ei1333.github.io/library/other/offline-dynamic-connectivity.hpp
+"""
+import numpy as np
+from numba import njit, types as nb_types
+from numba.typed import Dict
+
+from UnionFindTree import RollbackUnionFind
+
+
+ADD, REMOVE, SAME, COUNT = 0, 1, 2, 3
+
+
+@njit(cache=True)
+def _edge_intervals(n, types, us, vs):
+    """
+    辺u-v(u <= v)が存在する時刻の区間[l, r)と端点を返す。
+    同じ辺が多重に追加されている間は1本の辺として扱う。
+    """
+    q = types.shape[0]
+    count = Dict.empty(key_type=nb_types.int64, value_type=nb_types.int64)
+    start = Dict.empty(key_type=nb_types.int64, value_type=nb_types.int64)
+    ls = np.empty(q, dtype=np.int64)
+    rs = np.empty(q, dtype=np.int64)
+    eu = np.empty(q, dtype=np.int64)
+    ev = np.empty(q, dtype=np.int64)
+    k = 0
+    for t in range(q):
+        if types[t] != ADD and types[t] != REMOVE:
+            continue
+        u, v = min(us[t], vs[t]), max(us[t], vs[t])
+        key = u * n + v
+        c = count.get(key, 0)
+        if types[t] == ADD:
+            if c == 0:
+                start[key] = t
+            count[key] = c + 1
+        else:
+            assert c > 0, "removed an edge that does not exist"
+            if c == 1:
+                ls[k], rs[k], eu[k], ev[k] = start[key], t, u, v
+                k += 1
+            count[key] = c - 1
+    for key, c in count.items():
+        if c > 0:
+            ls[k], rs[k], eu[k], ev[k] = start[key], q, key // n, key % n
+            k += 1
+    return ls[:k], rs[:k], eu[:k], ev[:k]
+
+
+@njit(cache=True)
+def _cover(size, l, r, buf):
+    """時刻の区間[l, r)に対応するセグメント木のノードをbufに書き込んで個数を返す"""
+    k = 0
+    l += size
+    r += size
+    while l < r:
+        if l & 1:
+            buf[k] = l
+            k += 1
+            l += 1
+        if r & 1:
+            r -= 1
+            buf[k] = r
+            k += 1
+        l >>= 1
+        r >>= 1
+    return k
+
+
+@njit(cache=True)
+def _segment_lists(size, ls, rs):
+    """
+    時刻の区間[ls[i] + 1, rs[i])（追加した直後から削除する直前まで）をセグメント木のノードに分け、
+    ノードxに載る辺の番号をitems[offsets[x]:offsets[x + 1]]としてCSR形式で返す。
+    """
+    buf = np.empty(128, dtype=np.int64)
+    offsets = np.zeros(2 * size + 1, dtype=np.int64)
+    for i in range(ls.shape[0]):
+        k = _cover(size, ls[i] + 1, rs[i], buf)
+        for j in range(k):
+            offsets[buf[j] + 1] += 1
+    for x in range(2 * size):
+        offsets[x + 1] += offsets[x]
+    fill = offsets[:-1].copy()
+    items = np.empty(offsets[-1], dtype=np.int64)
+    for i in range(ls.shape[0]):
+        k = _cover(size, ls[i] + 1, rs[i], buf)
+        for j in range(k):
+            items[fill[buf[j]]] = i
+            fill[buf[j]] += 1
+    return offsets, items
+
+
+@njit
+def _solve(n, types, us, vs):
+    q = types.shape[0]
+    size = 1
+    while size < q:
+        size <<= 1
+    ls, rs, eu, ev = _edge_intervals(n, types, us, vs)
+    offsets, items = _segment_lists(size, ls, rs)
+
+    # 質問を含む部分木だけ下りる
+    has_query = np.zeros(2 * size, dtype=np.bool_)
+    answer_index = np.full(q, -1, dtype=np.int64)
+    k = 0
+    for t in range(q):
+        if types[t] == SAME or types[t] == COUNT:
+            has_query[size + t] = True
+            answer_index[t] = k
+            k += 1
+    for x in range(size - 1, 0, -1):
+        has_query[x] = has_query[2 * x] or has_query[2 * x + 1]
+    ans = np.empty(k, dtype=np.int64)
+
+    uf = RollbackUnionFind(n)
+    state = np.empty(2 * size, dtype=np.int64)
+    stack = np.empty(256, dtype=np.int64)
+    stack[0] = 1
+    top = 1
+    while top > 0:
+        top -= 1
+        x = stack[top]
+        if x < 0:  # 部分木を出るときに元に戻す
+            uf.rollback(state[~x])
+            continue
+        if not has_query[x]:
+            continue
+        state[x] = uf.snapshot()
+        for j in range(offsets[x], offsets[x + 1]):
+            i = items[j]
+            uf.union(eu[i], ev[i])
+        if x >= size:
+            t = x - size
+            if types[t] == SAME:
+                ans[answer_index[t]] = 1 if uf.same(us[t], vs[t]) else 0
+            else:
+                ans[answer_index[t]] = uf.group_count()
+            uf.rollback(state[x])
+        else:
+            stack[top] = ~x
+            stack[top + 1] = 2 * x + 1
+            stack[top + 2] = 2 * x
+            top += 3
+    return ans
+
+
+def offline_dynamic_connectivity(n, types, us, vs):
+    """
+    n頂点の空のグラフに対するクエリ列を処理し、SAME/COUNTのクエリの答えを順に並べたnp.int64の配列を返す
+    """
+    types = np.asarray(types, dtype=np.int64)
+    us = np.asarray(us, dtype=np.int64)
+    vs = np.asarray(vs, dtype=np.int64)
+    assert types.shape == us.shape == vs.shape
+    if types.shape[0] == 0:
+        return np.zeros(0, dtype=np.int64)
+    return _solve(n, types, us, vs)
@@ -1,4 +1,12 @@
+import numpy as np
+from numba import njit
+
+from Graph import CSRGraph, as_csr
+
+
 def EulerTour(X, i0=0):
+    if isinstance(X, CSRGraph):
+        return euler_tour_csr(X.offsets, X.targets, i0)
     n = len(X)
     """
     「部分木」＝「オイラーツアーの区間」は典型！
@@ -46,3 +54,137 @@ def EulerTour(X, i0=0):
                 Q.append(~a)
                 Q.append(a)
     return ET, ET1, ET2, DE, P
+
+
+@njit(cache=True)
+def euler_tour_csr(offsets, targets, root=0):
+    """
+    EulerTourをCSR形式の隣接リスト(offsets, targets)上で非再帰に行う。
+    返り値の意味はEulerTourと同じで、全てnp.int32の配列。
+        ET  : 訪れた順の頂点番号
+        ET1 : 頂点vに入った時刻（ETにおける位置）
+        ET2 : 頂点vの部分木の最後の頂点の時刻（部分木はET[ET1[v]:ET2[v] + 1]）
+        DE  : 深さ
+        P   : 親（根は-1）
+    """
+    n = offsets.shape[0] - 1
+    ET = np.empty(n, dtype=np.int32)
+    ET1 = np.zeros(n, dtype=np.int32)
+    ET2 = np.zeros(n, dtype=np.int32)
+    DE = np.zeros(n, dtype=np.int32)
+    P = np.full(n, -1, dtype=np.int32)
+    visited = np.zeros(n, dtype=np.bool_)
+    # 行きがけはi、帰りがけは~iを積む
+    stack = np.empty(2 * n, dtype=np.int64)
+    stack[0] = ~root
+    stack[1] = root
+    top = 2
+    visited[root] = True
+    cnt = -1
+    while top > 0:
+        top -= 1
+        i = stack[top]
+        if i < 0:
+            ET2[~i] = cnt
+            continue
+        cnt += 1
+        ET[cnt] = i
+        ET1[i] = cnt
+        for j in range(offsets[i + 1] - 1, offsets[i] - 1, -1):
+            a = targets[j]
+            if not visited[a]:
+                visited[a] = True
+                P[a] = i
+                DE[a] = DE[i] + 1
+                stack[top] = ~a
+                stack[top + 1] = a
+                top += 2
+    return ET[:cnt + 1].copy(), ET1, ET2, DE, P
+
+
+@njit
+def _point_add_many(bit, ET1, vs, xs):
+    for k in range(vs.shape[0]):
+        bit.add(ET1[vs[k]] + 1, xs[k])
+
+
+@njit
+def _subtree_sum_many(bit, ET1, ET2, vs):
+    ret = np.empty(vs.shape[0], dtype=np.int64)
+    for k in range(vs.shape[0]):
+        ret[k] = bit.get(ET1[vs[k]] + 1, ET2[vs[k]] + 1)
+    return ret
+
+
+@njit
+def _subtree_add_many(bit, ET1, ET2, vs, xs):
+    for k in range(vs.shape[0]):
+        bit.add(ET1[vs[k]] + 1, xs[k])
+        if ET2[vs[k]] + 2 <= bit.n:
+            bit.add(ET2[vs[k]] + 2, -xs[k])
+
+
+@njit
+def _point_get_many(bit, ET1, vs):
+    ret = np.empty(vs.shape[0], dtype=np.int64)
+    for k in range(vs.shape[0]):
+        ret[k] = bit.sum(ET1[vs[k]] + 1)
+    return ret
+
+
+@njit
+def _point_update_many(seg, ET1, vs, xs):
+    for k in range(vs.shape[0]):
+        seg.update(ET1[vs[k]], xs[k])
+
+
+@njit
+def _subtree_query_many(seg, ET1, ET2, vs):
+    ret = np.empty(vs.shape[0], dtype=np.int64)
+    for k in range(vs.shape[0]):
+        ret[k] = seg.query(ET1[vs[k]], ET2[vs[k]] + 1)
+    return ret
+
+
+class CompiledEulerTour():
+    """
+    euler_tour_csrの結果を持ち、部分木に対する操作をBIT/SegTreeの区間操作にまとめて変換する。
+    頂点vはBIT.NumbaBITでは(ET1[v] + 1)番目(1-indexed)、SegTreeではET1[v]番目(0-indexed)に対応する。
+    各メソッドは頂点と値の配列を受け取り、ループ全体をコンパイル済みのコードで回す。
+    使用例：
+        et = CompiledEulerTour(offsets, targets)
+        bit = NumbaBIT(n)
+        et.point_add_many(bit, vs, xs)   # 頂点vs[k]にxs[k]を足す
+        et.subtree_sum_many(bit, vs)     # 各vs[k]の部分木の和
+    """
+    def __init__(self, offsets, targets=None, root=0):
+        """offsetsの代わりにGraph.CSRGraphか隣接リストを渡す場合はtargetsを省略する"""
+        if targets is None:
+            offsets, targets, _ = as_csr(offsets)
+        self.n = offsets.shape[0] - 1
+        self.root = root
+        self.ET, self.ET1, self.ET2, self.DE, self.P = euler_tour_csr(offsets, targets, root)
+
+    def point_add_many(self, bit, vs, xs):
+        """NumbaBITについて、頂点vs[k]の値にxs[k]を足す"""
+        _point_add_many(bit, self.ET1, np.asarray(vs, dtype=np.int64), np.asarray(xs, dtype=np.int64))
+
+    def subtree_sum_many(self, bit, vs):
+        """NumbaBITについて、頂点vs[k]の部分木の値の和を並べた配列を返す"""
+        return _subtree_sum_many(bit, self.ET1, self.ET2, np.asarray(vs, dtype=np.int64))
+
+    def subtree_add_many(self, bit, vs, xs):
+        """NumbaBIT（imos法）について、頂点vs[k]の部分木の全ての値にxs[k]を足す"""
+        _subtree_add_many(bit, self.ET1, self.ET2, np.asarray(vs, dtype=np.int64), np.asarray(xs, dtype=np.int64))
+
+    def point_get_many(self, bit, vs):
+        """NumbaBIT（imos法）について、頂点vs[k]の値を並べた配列を返す"""
+        return _point_get_many(bit, self.ET1, np.asarray(vs, dtype=np.int64))
+
+    def point_update_many(self, seg, vs, xs):
+        """SegTreeについて、頂点vs[k]の値をxs[k]にする"""
+        _point_update_many(seg, self.ET1, np.asarray(vs, dtype=np.int64), np.asarray(xs, dtype=np.int64))
+
+    def subtree_query_many(self, seg, vs):
+        """SegTreeについて、頂点vs[k]の部分木の値の積を並べた配列を返す"""
+        return _subtree_query_many(seg, self.ET1, self.ET2, np.asarray(vs, dtype=np.int64))
@@ -0,0 +1,302 @@
+"""
+形式的冪級数(FPS)のライブラリ。NTT-friendlyな素数mod(デフォルトは998244353)上で
+    fps_inv  : 1/f
+    fps_log  : log f  (f[0] = 1)
+    fps_exp  : exp f  (f[0] = 0)
+    fps_pow  : f^k
+    fps_sqrt : √f     (存在しなければ長さ0の配列を返す)
+のx^nまでの係数をNewton法によるダブリングでそれぞれO(nlogn)で求める。
+入出力はnp.int64の配列。作業用の配列は最初に最大サイズで確保し、
+ダブリングの各ステップではその先頭部分を使い回すことでメモリ確保を繰り返さないようにしている。
+参考：https://qiita.com/hotman78/items/f0e6d2265badd84d429a
+使用例：
+    f = np.array([1, 1], dtype=np.int64)  # 1 + x
+    print(fps_inv(f, 5))  # [1, 998244352, 1, 998244352, 1]
+"""
+import numpy as np
+from numba import njit
+
+from Convolution import pow_mod, ntt, ntt_primitive_root
+
+
+DEFAULT_MOD = 998244353
+
+
+@njit("i8(i8)", cache=True)
+def _ceil_pow2(n):
+    size = 1
+    while size < n:
+        size <<= 1
+    return size
+
+
+@njit("i8(i8,i8)", cache=True)
+def sqrt_mod(a, p):
+    """
+    Tonelli-Shanksのアルゴリズムで、素数pを法とするaの平方根を1つ返す。
+    平方根が存在しなければ-1を返す。
+    """
+    a %= p
+    if a < 2 or p == 2:
+        return a
+    if pow_mod(a, (p - 1) // 2, p) != 1:
+        return -1
+    if p % 4 == 3:
+        return pow_mod(a, (p + 1) // 4, p)
+    q, s = p - 1, 0
+    while q % 2 == 0:
+        q //= 2
+        s += 1
+    z = 2
+    while pow_mod(z, (p - 1) // 2, p) != p - 1:
+        z += 1
+    m, c, t, r = s, pow_mod(z, q, p), pow_mod(a, q, p), pow_mod(a, (q + 1) // 2, p)
+    while t != 1:
+        i, tt = 0, t
+        while tt != 1:
+            tt = tt * tt % p
+            i += 1
+        b = pow_mod(c, 1 << (m - i - 1), p)
+        m, c, t, r = i, b * b % p, t * b % p * b % p, r * b % p
+    return r
+
+
+@njit(cache=True)
+def _inv_table(n, mod):
+    """invs[i] = i^(-1) mod mod (1 <= i <= n) をO(n)で求める"""
+    invs = np.ones(n + 1, dtype=np.int64)
+    for i in range(2, n + 1):
+        invs[i] = mod - mod // i * invs[mod % i] % mod
+    return invs
+
+
+@njit(cache=True)
+def _mul_into(a, la, b, lb, n, out, buf1, buf2, mod, g):
+    """
+    out[:n] = (a[:la] * b[:lb]) mod x^n を計算する。
+    buf1, buf2は作業領域で、outはaやbと同じ配列でもよい。
+    """
+    la = min(la, n)
+    lb = min(lb, n)
+    if n <= 0:
+        return
+    if la <= 0 or lb <= 0:
+        out[:n] = 0
+        return
+    size = _ceil_pow2(la + lb - 1)
+    x = buf1[:size]
+    y = buf2[:size]
+    x[:la] = a[:la]
+    x[la:] = 0
+    y[:lb] = b[:lb]
+    y[lb:] = 0
+    ntt(x, mod, g, False)
+    ntt(y, mod, g, False)
+    for i in range(size):
+        x[i] = x[i] * y[i] % mod
+    ntt(x, mod, g, True)
+    m = min(n, la + lb - 1)
+    out[:m] = x[:m]
+    out[m:n] = 0
+
+
+@njit(cache=True)
+def _inv_into(f, lf, n, out, buf1, buf2, mod, g):
+    """
+    out[:n] = 1/f mod x^n (fはf[:lf]のみ参照する)
+    g_{2m} = g_m (2 - f g_m) を長さ2mの巡回畳み込みで計算する。
+    f g_mの下位m項は1, 0, ..., 0と分かっているので、そこを0にしてからもう一度g_mを掛ければ
+    上位m項が求める値の符号反転になる。
+    """
+    out[0] = pow_mod(f[0], mod - 2, mod)
+    m = 1
+    while m < n:
+        m2 = m << 1
+        x = buf1[:m2]
+        y = buf2[:m2]
+        k = min(lf, m2)
+        x[:k] = f[:k]
+        x[k:] = 0
+        y[:m] = out[:m]
+        y[m:] = 0
+        ntt(x, mod, g, False)
+        ntt(y, mod, g, False)
+        for i in range(m2):
+            x[i] = x[i] * y[i] % mod
+        ntt(x, mod, g, True)
+        x[:m] = 0
+        ntt(x, mod, g, False)
+        for i in range(m2):
+            x[i] = x[i] * y[i] % mod
+        ntt(x, mod, g, True)
+        for i in range(m, min(m2, n)):
+            out[i] = (mod - x[i]) % mod
+        m = m2
+
+
+@njit(cache=True)
+def _log_into(f, lf, n, out, inv_buf, buf1, buf2, invs, mod, g):
+    """out[:n] = log f mod x^n = ∫(f'/f)dx (f[0] = 1が前提)"""
+    if n <= 1:
+        out[:n] = 0
+        return
+    _inv_into(f, lf, n, inv_buf, buf1, buf2, mod, g)
+    for i in range(n - 1):
+        out[i] = f[i + 1] * (i + 1) % mod if i + 1 < lf else 0
+    _mul_into(out, n - 1, inv_buf, n - 1, n - 1, out, buf1, buf2, mod, g)
+    for i in range(n - 1, 0, -1):
+        out[i] = out[i - 1] * invs[i] % mod
+    out[0] = 0
+
+
+@njit(cache=True)
+def _exp_into(f, lf, n, out, lg, inv_buf, buf1, buf2, invs, mod, g):
+    """out[:n] = exp f mod x^n (f[0] = 0が前提)。 g_{2m} = g_m (1 - log g_m + f)"""
+    out[0] = 1
+    m = 1
+    while m < n:
+        m2 = min(m << 1, n)
+        _log_into(out, m, m2, lg, inv_buf, buf1, buf2, invs, mod, g)
+        for i in range(m2):
+            lg[i] = ((f[i] if i < lf else 0) - lg[i]) % mod
+        lg[0] = (lg[0] + 1) % mod
+        _mul_into(out, m, lg, m2, m2, out, buf1, buf2, mod, g)
+        m = m2
+
+
+@njit(cache=True)
+def _prepare(n, mod):
+    """原始根と作業領域をまとめて用意する"""
+    size = 2 * _ceil_pow2(n)
+    g = ntt_primitive_root(mod, size)
+    assert g > 0, "mod must be an NTT-friendly prime"
+    buf1 = np.empty(size, dtype=np.int64)
+    buf2 = np.empty(size, dtype=np.int64)
+    return g, buf1, buf2
+
+
+@njit(cache=True)
+def fps_inv(f, n, mod=DEFAULT_MOD):
+    """1/fのx^(n-1)までの係数を返す。f[0] != 0が必要"""
+    f = f % mod
+    assert f[0] != 0, "constant term must be invertible"
+    out = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return out
+    g, buf1, buf2 = _prepare(n, mod)
+    _inv_into(f, f.shape[0], n, out, buf1, buf2, mod, g)
+    return out
+
+
+@njit(cache=True)
+def fps_log(f, n, mod=DEFAULT_MOD):
+    """log fのx^(n-1)までの係数を返す。f[0] = 1が必要"""
+    f = f % mod
+    assert f[0] == 1, "constant term must be 1"
+    out = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return out
+    g, buf1, buf2 = _prepare(n, mod)
+    inv_buf = np.empty(n, dtype=np.int64)
+    _log_into(f, f.shape[0], n, out, inv_buf, buf1, buf2, _inv_table(n, mod), mod, g)
+    return out
+
+
+@njit(cache=True)
+def fps_exp(f, n, mod=DEFAULT_MOD):
+    """exp fのx^(n-1)までの係数を返す。f[0] = 0が必要"""
+    f = f % mod
+    assert f.shape[0] == 0 or f[0] == 0, "constant term must be 0"
+    out = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return out
+    g, buf1, buf2 = _prepare(n, mod)
+    lg = np.empty(n, dtype=np.int64)
+    inv_buf = np.empty(n, dtype=np.int64)
+    _exp_into(f, f.shape[0], n, out, lg, inv_buf, buf1, buf2, _inv_table(n, mod), mod, g)
+    return out
+
+
+@njit(cache=True)
+def _pow_normalized(f, z, c, k_mod, n, mod):
+    """
+    f = c x^z (1 + ...) に対して (f / (c x^z))^k をlogとexp経由で求める（長さn）。
+    kはmod上の値k_modとして与える。
+    """
+    out = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return out
+    lf = min(f.shape[0] - z, n)
+    inv_c = pow_mod(c, mod - 2, mod)
+    h = np.empty(lf, dtype=np.int64)
+    for i in range(lf):
+        h[i] = f[z + i] * inv_c % mod
+    g, buf1, buf2 = _prepare(n, mod)
+    lg = np.empty(n, dtype=np.int64)
+    inv_buf = np.empty(n, dtype=np.int64)
+    invs = _inv_table(n, mod)
+    a = np.empty(n, dtype=np.int64)
+    _log_into(h, lf, n, a, inv_buf, buf1, buf2, invs, mod, g)
+    for i in range(n):
+        a[i] = a[i] * k_mod % mod
+    _exp_into(a, n, n, out, lg, inv_buf, buf1, buf2, invs, mod, g)
+    return out
+
+
+@njit(cache=True)
+def _lowest_nonzero(f, n):
+    for i in range(min(f.shape[0], n)):
+        if f[i] != 0:
+            return i
+    return -1
+
+
+@njit(cache=True)
+def fps_pow(f, k, n, mod=DEFAULT_MOD):
+    """f^kのx^(n-1)までの係数を返す(k >= 0)"""
+    assert k >= 0
+    f = f % mod
+    out = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return out
+    if k == 0:
+        out[0] = 1
+        return out
+    z = _lowest_nonzero(f, n)
+    if z < 0 or (z > 0 and k >= n) or z * k >= n:
+        return out
+    shift = z * k
+    c = f[z]
+    body = _pow_normalized(f, z, c, k % mod, n - shift, mod)
+    ck = pow_mod(c, k, mod)
+    for i in range(n - shift):
+        out[shift + i] = body[i] * ck % mod
+    return out
+
+
+@njit(cache=True)
+def fps_sqrt(f, n, mod=DEFAULT_MOD):
+    """
+    g^2 = fとなるgのx^(n-1)までの係数を1つ返す。
+    存在しない場合（最低次の次数が奇数、または最低次の係数が平方非剰余）は長さ0の配列を返す。
+    """
+    f = f % mod
+    out = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return out
+    z = _lowest_nonzero(f, f.shape[0])
+    if z < 0:
+        return out
+    if z % 2 == 1:
+        return np.zeros(0, dtype=np.int64)
+    c = f[z]
+    s = sqrt_mod(c, mod)
+    if s < 0:
+        return np.zeros(0, dtype=np.int64)
+    shift = z // 2
+    if shift >= n:
+        return out
+    body = _pow_normalized(f, z, c, pow_mod(2, mod - 2, mod), n - shift, mod)
+    for i in range(n - shift):
+        out[shift + i] = body[i] * s % mod
+    return out
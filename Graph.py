@@ -0,0 +1,179 @@
+"""
+グラフをCSR形式(offsets, targets, weights)のnp.int64配列で持つコンテナ。
+重みは整数のみ（他のモジュールはnp.int64で集計するので、浮動小数点数の重みは切り捨てずにassertで弾く）。
+頂点vから出る辺はtargets[offsets[v]:offsets[v + 1]]（重みは同じ範囲のweights）。
+頂点ごとにPythonのリストを作らないので、10^7本の辺でも軽く扱える。
+他のグラフ系のモジュール(LCA, EulerTour, TopologicalSort, StronglyConnectedComponents, Dinicなど)は
+隣接リストの代わりにCSRGraphをそのまま受け取れる。
+len(g)とg[v]も使えるので、隣接リストを前提に書かれたコードにも（遅いが）そのまま渡せる。
+使用例：
+    g, rest = CSRGraph.from_text(directed=False, one_indexed=True)  # "N M\\n u1 v1\\n ..." を標準入力から一括で読む
+    g = CSRGraph.from_edges(n, us, vs, ws)
+    g.save("graph"); g = CSRGraph.load("graph")  # .npyに保存してmmapで読み込む
+"""
+import os
+import sys
+from itertools import chain
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def parse_ints(buf):
+    """空白区切りの整数(負も可)が並んだバイト列(np.uint8の配列)をnp.int64の配列にする"""
+    n = buf.shape[0]
+    ret = np.empty(n // 2 + 1, dtype=np.int64)
+    k = 0
+    i = 0
+    while i < n:
+        c = buf[i]
+        if c == 45 or 48 <= c <= 57:  # '-' or '0'-'9'
+            neg = c == 45
+            if neg:
+                i += 1
+            x = 0
+            while i < n and 48 <= buf[i] <= 57:
+                x = x * 10 + (buf[i] - 48)
+                i += 1
+            ret[k] = -x if neg else x
+            k += 1
+        else:
+            i += 1
+    return ret[:k].copy()
+
+
+@njit(cache=True)
+def _build_csr(n, us, vs, ws, directed):
+    """辺のリストから計数ソートでCSRを作る。directed=Falseなら逆向きの辺も張る"""
+    m = us.shape[0]
+    total = m if directed else 2 * m
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    for i in range(m):
+        offsets[us[i] + 1] += 1
+        if not directed:
+            offsets[vs[i] + 1] += 1
+    for v in range(n):
+        offsets[v + 1] += offsets[v]
+    fill = offsets[:-1].copy()
+    targets = np.empty(total, dtype=np.int64)
+    weights = np.empty(total, dtype=np.int64)
+    for i in range(m):
+        u, v = us[i], vs[i]
+        targets[fill[u]] = v
+        weights[fill[u]] = ws[i]
+        fill[u] += 1
+        if not directed:
+            targets[fill[v]] = u
+            weights[fill[v]] = ws[i]
+            fill[v] += 1
+    return offsets, targets, weights
+
+
+class CSRGraph():
+    """
+    頂点数n、辺数mのグラフ。weightsは重みなしならNone。重みは整数の配列であること。
+    無向グラフは両方向の有向辺として持つ（m = 2 * 元の辺数）。
+    """
+    def __init__(self, offsets, targets, weights=None):
+        self.offsets = offsets
+        self.targets = targets
+        assert weights is None or np.issubdtype(weights.dtype, np.integer), "edge weights must be integers"
+        self.weights = weights
+        self.n = offsets.shape[0] - 1
+        self.m = targets.shape[0]
+
+    @classmethod
+    def from_edges(cls, n, us, vs, ws=None, directed=True):
+        """辺の配列(us[i] -> vs[i], 重みws[i])から作る"""
+        us = np.asarray(us, dtype=np.int64)
+        vs = np.asarray(vs, dtype=np.int64)
+        weighted = ws is not None
+        if weighted:
+            ws = np.asarray(ws)
+            assert ws.shape[0] == 0 or np.issubdtype(ws.dtype, np.integer), "edge weights must be integers"
+            ws = ws.astype(np.int64, copy=False)
+        else:
+            ws = np.zeros(us.shape[0], dtype=np.int64)
+        offsets, targets, weights = _build_csr(n, us, vs, ws, directed)
+        return cls(offsets, targets, weights if weighted else None)
+
+    @classmethod
+    def from_repn(cls, repn, weights=None):
+        """隣接リスト(とそれと同じ形の重みのリスト)から作る"""
+        n = len(repn)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, repn), dtype=np.int64, count=n), out=offsets[1:])
+        targets = np.fromiter(chain.from_iterable(repn), dtype=np.int64, count=offsets[-1])
+        if weights is not None:
+            weights = np.array(list(chain.from_iterable(weights)))
+            assert weights.shape[0] == 0 or np.issubdtype(weights.dtype, np.integer), "edge weights must be integers"
+            weights = weights.astype(np.int64, copy=False)
+        return cls(offsets, targets, weights)
+
+    @classmethod
+    def from_text(cls, data=None, n=None, m=None, weighted=False, directed=True, one_indexed=False):
+        """
+        "N M\\n u1 v1 (w1)\\n u2 v2 (w2)\\n ..." 形式のテキストを一括で読んで作る。
+        dataを省略するとsys.stdin.buffer.read()を読む。n, mを与えた場合はヘッダ行を読まない。
+        辺の後ろに残った整数（クエリなど）もnp.int64の配列として一緒に返す。
+        """
+        if data is None:
+            data = sys.stdin.buffer.read()
+        ints = parse_ints(np.frombuffer(data, dtype=np.uint8))
+        p = 0
+        if n is None:
+            n, m = int(ints[0]), int(ints[1])
+            p = 2
+        k = 3 if weighted else 2
+        E = ints[p:p + k * m].reshape(m, k)
+        us, vs = E[:, 0], E[:, 1]
+        if one_indexed:
+            us, vs = us - 1, vs - 1
+        g = cls.from_edges(n, us, vs, E[:, 2] if weighted else None, directed)
+        return g, ints[p + k * m:]
+
+    def save(self, prefix):
+        """prefix_offsets.npy, prefix_targets.npy(, prefix_weights.npy)に保存する"""
+        np.save(prefix + "_offsets.npy", self.offsets)
+        np.save(prefix + "_targets.npy", self.targets)
+        if self.weights is not None:
+            np.save(prefix + "_weights.npy", self.weights)
+
+    @classmethod
+    def load(cls, prefix, mmap=True):
+        """saveで保存したグラフを読み込む。mmap=Trueならメモリマップで開くのでほぼ一瞬で終わる"""
+        mode = 'r' if mmap else None
+        offsets = np.load(prefix + "_offsets.npy", mmap_mode=mode)
+        targets = np.load(prefix + "_targets.npy", mmap_mode=mode)
+        weights = None
+        if os.path.exists(prefix + "_weights.npy"):
+            weights = np.load(prefix + "_weights.npy", mmap_mode=mode)
+        return cls(offsets, targets, weights)
+
+    def edges(self):
+        """辺を(us, vs, ws)の配列で返す"""
+        us = np.repeat(np.arange(self.n, dtype=np.int64), np.diff(self.offsets))
+        return us, np.asarray(self.targets), self.weights
+
+    def to_repn(self):
+        """隣接リスト（リストのリスト）に変換する"""
+        t = self.targets.tolist()
+        o = self.offsets.tolist()
+        return [t[o[v]:o[v + 1]] for v in range(self.n)]
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, v):
+        return self.targets[self.offsets[v]:self.offsets[v + 1]]
+
+
+def as_csr(repn, weights=None):
+    """
+    CSRGraphまたは隣接リストrepnを受け取って(offsets, targets, weights)を返す。
+    グラフ系の各モジュールの入口で使う。重みがなければweightsはNone。
+    """
+    if not isinstance(repn, CSRGraph):
+        repn = CSRGraph.from_repn(repn, weights)
+    return repn.offsets, repn.targets, repn.weights
@@ -0,0 +1,224 @@
+"""
+重軽分解(Heavy-Light Decomposition)のライブラリ。
+各頂点から部分木サイズ最大の子への辺をheavyとして木をheavy pathに分解し、
+heavy pathが連続するように頂点を並べ替える(pos[v] = 頂点vの新しい番号)。すると
+    パスu-v   : O(logn)個の半開区間[l, r)
+    部分木v   : 1個の半開区間[pos[v], pos[v] + size[v])
+に対応するので、SegTreeやLazySegTreeにそのまま載せられる。
+構築は非再帰で、結果はnp.int32の配列に格納する。
+SegTree/LazySegTreeのモノイドは可換であること（パスを上りと下りで区別しないため）。
+path-sumにしたい場合はSegTree.funcやLazySegTree.op_Xを書き換えること。
+使用例：
+    hld = HeavyLightDecomposition(repn)
+    seg = LazySegTree(n)
+    seg.build(hld.reorder(values))
+    hld.path_action(seg, u, v, 3)       # u-vパス上の頂点に3を足す
+    print(hld.path_prod(seg, u, v))     # u-vパス上の頂点の最小値
+参考：https://codeforces.com/blog/entry/53170
+"""
+import numpy as np
+from numba import njit
+
+from Graph import as_csr
+
+
+# 1つのパスが分割される区間の個数の上限(2 * log2(n) + 1 <= 129)
+MAX_RANGES = 129
+
+
+@njit(cache=True)
+def _decompose(offsets, targets, root):
+    n = offsets.shape[0] - 1
+    parent = np.full(n, -1, dtype=np.int32)
+    depth = np.zeros(n, dtype=np.int32)
+    size = np.ones(n, dtype=np.int32)
+    heavy = np.full(n, -1, dtype=np.int32)
+    head = np.zeros(n, dtype=np.int32)
+    pos = np.zeros(n, dtype=np.int32)
+    order = np.empty(n, dtype=np.int32)
+    visited = np.zeros(n, dtype=np.bool_)
+
+    # 1. 行きがけ順を求める
+    stack = np.empty(n, dtype=np.int32)
+    stack[0] = root
+    top = 1
+    visited[root] = True
+    t = 0
+    while top > 0:
+        top -= 1
+        v = stack[top]
+        order[t] = v
+        t += 1
+        for i in range(offsets[v], offsets[v + 1]):
+            nv = targets[i]
+            if not visited[nv]:
+                visited[nv] = True
+                parent[nv] = v
+                depth[nv] = depth[v] + 1
+                stack[top] = nv
+                top += 1
+
+    # 2. 帰りがけに部分木サイズとheavyな子を求める
+    for i in range(t - 1, 0, -1):
+        v = order[i]
+        p = parent[v]
+        size[p] += size[v]
+    for i in range(t - 1, 0, -1):
+        v = order[i]
+        p = parent[v]
+        if heavy[p] < 0 or size[v] > size[heavy[p]]:
+            heavy[p] = v
+
+    # 3. heavyな子を最後に積んで、heavy pathが連続した番号になるようにDFSする
+    stack[0] = root
+    top = 1
+    head[root] = root
+    k = 0
+    while top > 0:
+        top -= 1
+        v = stack[top]
+        pos[v] = k
+        k += 1
+        for i in range(offsets[v], offsets[v + 1]):
+            nv = targets[i]
+            if nv != parent[v] and nv != heavy[v]:
+                head[nv] = nv
+                stack[top] = nv
+                top += 1
+        if heavy[v] >= 0:
+            head[heavy[v]] = head[v]
+            stack[top] = heavy[v]
+            top += 1
+    return parent, depth, size, head, pos
+
+
+@njit(cache=True)
+def _path_ranges(parent, depth, head, pos, u, v, edge, buf):
+    """
+    u-vパスに対応する半開区間をbuf[:k]に書き込んでkを返す。
+    edge=Trueならu, vのLCAを除く（辺の値を子の頂点に持たせる場合）。
+    """
+    k = 0
+    while head[u] != head[v]:
+        if depth[head[u]] < depth[head[v]]:
+            u, v = v, u
+        buf[k, 0] = pos[head[u]]
+        buf[k, 1] = pos[u] + 1
+        k += 1
+        u = parent[head[u]]
+    if depth[u] > depth[v]:
+        u, v = v, u
+    l = pos[u] + 1 if edge else pos[u]
+    if l < pos[v] + 1:
+        buf[k, 0] = l
+        buf[k, 1] = pos[v] + 1
+        k += 1
+    return k
+
+
+@njit
+def _path_query_many(seg, parent, depth, head, pos, us, vs, edge):
+    buf = np.empty((MAX_RANGES, 2), dtype=np.int64)
+    ret = np.empty(us.shape[0], dtype=np.int64)
+    for i in range(us.shape[0]):
+        k = _path_ranges(parent, depth, head, pos, us[i], vs[i], edge, buf)
+        res = seg.id_elem
+        for j in range(k):
+            res = seg.func(res, seg.query(buf[j, 0], buf[j, 1]))
+        ret[i] = res
+    return ret
+
+
+@njit
+def _path_prod_many(lst, parent, depth, head, pos, us, vs, edge):
+    buf = np.empty((MAX_RANGES, 2), dtype=np.int64)
+    ret = np.empty(us.shape[0], dtype=np.int64)
+    for i in range(us.shape[0]):
+        k = _path_ranges(parent, depth, head, pos, us[i], vs[i], edge, buf)
+        res = lst.id_elem_X
+        for j in range(k):
+            res = lst.op_X(res, lst.mul(buf[j, 0], buf[j, 1]))
+        ret[i] = res
+    return ret
+
+
+@njit
+def _path_action_many(lst, parent, depth, head, pos, us, vs, acts, edge):
+    buf = np.empty((MAX_RANGES, 2), dtype=np.int64)
+    for i in range(us.shape[0]):
+        k = _path_ranges(parent, depth, head, pos, us[i], vs[i], edge, buf)
+        for j in range(k):
+            lst.action(buf[j, 0], buf[j, 1], acts[i])
+
+
+class HeavyLightDecomposition():
+    """
+    頂点番号が0, 1, ..., n-1で与えられた木のrepn(隣接リストまたはGraph.CSRGraph)を入力としてインスタンス化する。
+    頂点vの値はセグ木のpos[v]番目に置くこと（reorderで並べ替えられる）。
+    辺の値を扱う場合は子の側の頂点に持たせてedge=Trueで呼ぶ。
+    """
+    def __init__(self, repn, root=0):
+        self.n = len(repn)
+        self.root = root
+        self.offsets, self.targets, _ = as_csr(repn)
+        self.parent, self.depth, self.size, self.head, self.pos = _decompose(self.offsets, self.targets, root)
+        self._buf = np.empty((MAX_RANGES, 2), dtype=np.int64)
+
+    def reorder(self, values):
+        """頂点番号順の値valuesを、セグ木に載せる順番に並べ替える"""
+        ret = np.empty(self.n, dtype=np.int64)
+        ret[self.pos] = values
+        return ret
+
+    def lca(self, u, v):
+        while self.head[u] != self.head[v]:
+            if self.depth[self.head[u]] < self.depth[self.head[v]]:
+                u, v = v, u
+            u = self.parent[self.head[u]]
+        return int(u if self.depth[u] < self.depth[v] else v)
+
+    def path_ranges(self, u, v, edge=False):
+        """u-vパスに対応する半開区間[l, r)を並べた(k, 2)の配列を返す"""
+        k = _path_ranges(self.parent, self.depth, self.head, self.pos, u, v, edge, self._buf)
+        return self._buf[:k].copy()
+
+    def subtree_range(self, v):
+        """vを根とする部分木に対応する半開区間[l, r)を返す"""
+        return int(self.pos[v]), int(self.pos[v] + self.size[v])
+
+    def path_query(self, seg, u, v, edge=False):
+        """SegTree segについてu-vパス上の値の積を返す"""
+        return int(self.path_query_many(seg, np.array([u]), np.array([v]), edge)[0])
+
+    def path_query_many(self, seg, us, vs, edge=False):
+        us = np.asarray(us, dtype=np.int64)
+        vs = np.asarray(vs, dtype=np.int64)
+        return _path_query_many(seg, self.parent, self.depth, self.head, self.pos, us, vs, edge)
+
+    def path_prod(self, lst, u, v, edge=False):
+        """LazySegTree lstについてu-vパス上の値の積を返す"""
+        return int(self.path_prod_many(lst, np.array([u]), np.array([v]), edge)[0])
+
+    def path_prod_many(self, lst, us, vs, edge=False):
+        us = np.asarray(us, dtype=np.int64)
+        vs = np.asarray(vs, dtype=np.int64)
+        return _path_prod_many(lst, self.parent, self.depth, self.head, self.pos, us, vs, edge)
+
+    def path_action(self, lst, u, v, a, edge=False):
+        """LazySegTree lstについてu-vパス上の値に作用aをかける"""
+        self.path_action_many(lst, np.array([u]), np.array([v]), np.array([a]), edge)
+
+    def path_action_many(self, lst, us, vs, acts, edge=False):
+        us = np.asarray(us, dtype=np.int64)
+        vs = np.asarray(vs, dtype=np.int64)
+        acts = np.asarray(acts, dtype=np.int64)
+        _path_action_many(lst, self.parent, self.depth, self.head, self.pos, us, vs, acts, edge)
+
+    def subtree_prod(self, lst, v):
+        """LazySegTree lstについてvの部分木の値の積を返す"""
+        return lst.mul(*self.subtree_range(v))
+
+    def subtree_action(self, lst, v, a):
+        """LazySegTree lstについてvの部分木の値に作用aをかける"""
+        l, r = self.subtree_range(v)
+        lst.action(l, r, a)
@@ -0,0 +1,168 @@
+"""
+Hopcroft-Karp法による2部グラフの最大マッチングのライブラリ。計算量はO(E√V)。
+左側の頂点0, ..., nl-1と右側の頂点0, ..., nr-1の間の辺(ls[i], rs[i])の配列を受け取り、
+左側の頂点から出る辺をCSRにしてnjitで解く。Dinicで単位容量のネットワークとして解くより軽い。
+    1. 未マッチの左側の頂点からのBFSで交互路の層を作る
+    2. 層に沿ったDFS（非再帰、current-arc付き）で頂点素な最短増加路をまとめて見つけて反転する
+を増加路がなくなるまで繰り返す。
+最小頂点被覆はKönigの定理から、最後のBFSで未マッチの左側の頂点から交互路で到達できる頂点の集合Zを使って
+(左側 - Z) ∪ (右側 ∩ Z) で得られる。
+使用例：
+    match_l, match_r = hopcroft_karp(nl, nr, ls, rs)    # match_l[u]はuの相手の右側の頂点（いなければ-1）
+    cover_l, cover_r = minimum_vertex_cover(nl, nr, ls, rs, match_l, match_r)
+参考：https://en.wikipedia.org/wiki/Hopcroft%E2%80%93Karp_algorithm
+"""
+import numpy as np
+from numba import njit
+
+from Graph import CSRGraph
+
+
+@njit(cache=True)
+def _bfs(offsets, targets, match_l, match_r, dist, queue):
+    """未マッチの左側の頂点からの交互路の層をdistに書き込み、増加路があればTrueを返す"""
+    nl = match_l.shape[0]
+    tail = 0
+    for u in range(nl):
+        if match_l[u] < 0:
+            dist[u] = 0
+            queue[tail] = u
+            tail += 1
+        else:
+            dist[u] = -1
+    found = False
+    head = 0
+    while head < tail:
+        u = queue[head]
+        head += 1
+        for i in range(offsets[u], offsets[u + 1]):
+            w = match_r[targets[i]]
+            if w < 0:
+                found = True
+            elif dist[w] < 0:
+                dist[w] = dist[u] + 1
+                queue[tail] = w
+                tail += 1
+    return found
+
+
+@njit(cache=True)
+def _augment(offsets, targets, match_l, match_r, dist, it, stack, root):
+    """rootから層に沿って増加路を探し、見つかれば反転してTrueを返す"""
+    stack[0] = root
+    top = 1
+    while top > 0:
+        u = stack[top - 1]
+        advanced = False
+        while it[u] < offsets[u + 1]:
+            r = targets[it[u]]
+            w = match_r[r]
+            if w < 0:
+                # 増加路が見つかったので、スタックに積まれた頂点のマッチングを順に付け替える
+                for j in range(top - 1, -1, -1):
+                    x = stack[j]
+                    r = targets[it[x]]
+                    match_r[r] = x
+                    match_l[x] = r
+                return True
+            if dist[w] == dist[u] + 1:
+                stack[top] = w
+                top += 1
+                advanced = True
+                break
+            it[u] += 1
+        if not advanced:
+            dist[u] = -1  # 行き止まりなので以降は訪れない
+            top -= 1
+            if top > 0:
+                it[stack[top - 1]] += 1
+    return False
+
+
+@njit(cache=True)
+def _hopcroft_karp(offsets, targets, nr):
+    nl = offsets.shape[0] - 1
+    match_l = np.full(nl, -1, dtype=np.int64)
+    match_r = np.full(nr, -1, dtype=np.int64)
+    # 貪欲に初期解を作っておくと段階数が減る
+    for u in range(nl):
+        for i in range(offsets[u], offsets[u + 1]):
+            r = targets[i]
+            if match_r[r] < 0:
+                match_r[r] = u
+                match_l[u] = r
+                break
+    dist = np.empty(nl, dtype=np.int64)
+    queue = np.empty(nl, dtype=np.int64)
+    it = np.empty(nl, dtype=np.int64)
+    stack = np.empty(nl, dtype=np.int64)
+    while _bfs(offsets, targets, match_l, match_r, dist, queue):
+        it[:] = offsets[:-1]
+        for u in range(nl):
+            if match_l[u] < 0:
+                _augment(offsets, targets, match_l, match_r, dist, it, stack, u)
+    return match_l, match_r
+
+
+@njit(cache=True)
+def _vertex_cover(offsets, targets, match_l, match_r):
+    nl = match_l.shape[0]
+    nr = match_r.shape[0]
+    dist = np.empty(nl, dtype=np.int64)
+    queue = np.empty(nl, dtype=np.int64)
+    _bfs(offsets, targets, match_l, match_r, dist, queue)
+    cover_l = dist < 0
+    cover_r = np.zeros(nr, dtype=np.bool_)
+    for u in range(nl):
+        if dist[u] >= 0:
+            for i in range(offsets[u], offsets[u + 1]):
+                cover_r[targets[i]] = True
+    return cover_l, cover_r
+
+
+def _left_csr(nl, ls, rs):
+    g = CSRGraph.from_edges(nl, ls, rs)
+    return g.offsets, g.targets
+
+
+def hopcroft_karp(nl, nr, ls, rs):
+    """
+    左側nl頂点、右側nr頂点で辺(ls[i], rs[i])を持つ2部グラフの最大マッチングを求め、
+    (match_l, match_r)を返す。match_l[u]は左側の頂点uとマッチした右側の頂点で、いなければ-1（match_rも同様）。
+    マッチングの大きさは np.count_nonzero(match_l >= 0)。
+    """
+    offsets, targets = _left_csr(nl, ls, rs)
+    return _hopcroft_karp(offsets, targets, nr)
+
+
+def minimum_vertex_cover(nl, nr, ls, rs, match_l=None, match_r=None):
+    """
+    最小頂点被覆を(cover_l, cover_r)のnp.bool_の配列で返す（大きさは最大マッチングと等しい）。
+    hopcroft_karpの結果を渡せば解き直さない。補集合は最大独立集合になる。
+    """
+    offsets, targets = _left_csr(nl, ls, rs)
+    if match_l is None:
+        match_l, match_r = _hopcroft_karp(offsets, targets, nr)
+    return _vertex_cover(offsets, targets, match_l, match_r)
+
+
+if __name__ == '__main__':
+    """ランダムな2部グラフでNumbaDinicと速度を比べる"""
+    import time
+
+    from Dinic import NumbaDinic
+
+    hopcroft_karp(1, 1, [0], [0])
+    n, m = 10 ** 5, 10 ** 6
+    rng = np.random.default_rng(0)
+    ls = rng.integers(0, n, m)
+    rs = rng.integers(0, n, m)
+    start = time.perf_counter()
+    match_l, _ = hopcroft_karp(n, n, ls, rs)
+    print(f"HopcroftKarp: {np.count_nonzero(match_l >= 0)}, {time.perf_counter() - start:.3f}s")
+    start = time.perf_counter()
+    mf = NumbaDinic(2 * n + 2)
+    mf.add_links(np.full(n, 2 * n), np.arange(n), np.ones(n))
+    mf.add_links(ls, rs + n, np.ones(m))
+    mf.add_links(np.arange(n, 2 * n), np.full(n, 2 * n + 1), np.ones(n))
+    print(f"NumbaDinic  : {mf.max_flow(2 * n, 2 * n + 1)}, {time.perf_counter() - start:.3f}s")
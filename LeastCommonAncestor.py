@@ -1,3 +1,9 @@
+import numpy as np
+from numba import njit
+
+from Graph import as_csr
+
+
 class LCA():
     """
     木の最小共通祖先(Least Common Ancestor)をダブリングで求める。
@@ -77,4 +83,377 @@ class LCA():
                 u = self.parent[k][u]
                 v = self.parent[k][v]
 
-        return self.parent[0][u]
\ No newline at end of file
+        return self.parent[0][u]
+
+
+@njit(cache=True)
+def _dfs_preorder(offsets, targets, root):
+    """
+    rootからの非再帰DFSで行きがけ順order, 各頂点の訪問時刻tin, 親parent, 深さdepthを求める。
+    rootから到達できない頂点はtin = parent = depth = -1のまま。
+    """
+    n = offsets.shape[0] - 1
+    order = np.full(n, -1, dtype=np.int32)
+    tin = np.full(n, -1, dtype=np.int32)
+    parent = np.full(n, -1, dtype=np.int32)
+    depth = np.full(n, -1, dtype=np.int32)
+    stack = np.empty(n, dtype=np.int32)
+    stack[0] = root
+    top = 1
+    depth[root] = 0
+    t = 0
+    while top > 0:
+        top -= 1
+        v = stack[top]
+        order[t] = v
+        tin[v] = t
+        t += 1
+        for i in range(offsets[v + 1] - 1, offsets[v] - 1, -1):
+            nv = targets[i]
+            if nv == parent[v] or depth[nv] >= 0:
+                continue
+            parent[nv] = v
+            depth[nv] = depth[v] + 1
+            stack[top] = nv
+            top += 1
+    return order[:t].copy(), tin, parent, depth
+
+
+@njit(cache=True)
+def _build_sparse_table(order, tin, parent):
+    """
+    table[k][i] = min(tin[parent[order[j]]] for j in [i, i + 2^k))
+    order[1:]の各頂点の親の訪問時刻についての区間最小値を求めるためのsparse table。
+    """
+    n = order.shape[0]
+    log = 1
+    while (1 << log) < n:
+        log += 1
+    table = np.zeros((log, n), dtype=np.int32)
+    for i in range(1, n):
+        table[0, i] = tin[parent[order[i]]]
+    for k in range(log - 1):
+        w = 1 << k
+        for i in range(n - 2 * w + 1):
+            table[k + 1, i] = min(table[k, i], table[k, i + w])
+    return table
+
+
+@njit(cache=True)
+def _lca_many(table, tin, order, us, vs):
+    ret = np.empty(us.shape[0], dtype=np.int32)
+    for i in range(us.shape[0]):
+        u, v = us[i], vs[i]
+        if u == v:
+            ret[i] = u
+            continue
+        l, r = tin[u], tin[v]
+        if l > r:
+            l, r = r, l
+        l += 1
+        r += 1
+        k = 0
+        while (2 << k) <= r - l:
+            k += 1
+        ret[i] = order[min(table[k, l], table[k, r - (1 << k)])]
+    return ret
+
+
+@njit(cache=True)
+def _build_levels(tin, depth, order):
+    """
+    深さごとに頂点の訪問時刻を昇順に並べたCSR(level_offsets, level_tins)を作る。
+    行きがけ順に走査すれば各深さの中では自然に昇順になる。
+    """
+    max_depth = depth.max()
+    level_offsets = np.zeros(max_depth + 2, dtype=np.int64)
+    for v in order:
+        level_offsets[depth[v] + 1] += 1
+    for d in range(max_depth + 1):
+        level_offsets[d + 1] += level_offsets[d]
+    fill = level_offsets[:-1].copy()
+    level_tins = np.empty(order.shape[0], dtype=np.int32)
+    for v in order:
+        level_tins[fill[depth[v]]] = tin[v]
+        fill[depth[v]] += 1
+    return level_offsets, level_tins
+
+
+@njit(cache=True)
+def _kth_ancestor_many(tin, depth, order, level_offsets, level_tins, vs, ks):
+    """
+    vのk個上の祖先は、深さdepth[v] - kの頂点のうち訪問時刻がtin[v]以下で最大のもの。
+    これを二分探索で求める。k > depth[v]なら-1を返す。
+    """
+    ret = np.empty(vs.shape[0], dtype=np.int32)
+    for i in range(vs.shape[0]):
+        v, k = vs[i], ks[i]
+        d = depth[v] - k
+        if k < 0 or d < 0:
+            ret[i] = -1
+            continue
+        lo, hi = level_offsets[d], level_offsets[d + 1]
+        j = np.searchsorted(level_tins[lo:hi], tin[v], side='right') - 1
+        ret[i] = order[level_tins[lo + j]]
+    return ret
+
+
+@njit(cache=True)
+def _find(uf, x):
+    while uf[x] != x:
+        uf[x] = uf[uf[x]]
+        x = uf[x]
+    return x
+
+
+@njit(cache=True)
+def offline_lca(offsets, targets, root, us, vs):
+    """
+    TarjanのオフラインLCA。クエリ(us[i], vs[i])をまとめて O((n + q)α(n)) で答える。
+    sparse tableを作らないのでメモリはO(n + q)で済み、クエリが非常に多い場合に向く。
+    DFSは非再帰で、頂点vの探索を終えたときにvに関するクエリのうち相手も探索済みのものに答える。
+    """
+    n = offsets.shape[0] - 1
+    q = us.shape[0]
+    # 頂点ごとのクエリ番号のCSR
+    qoff = np.zeros(n + 1, dtype=np.int64)
+    for i in range(q):
+        qoff[us[i] + 1] += 1
+        qoff[vs[i] + 1] += 1
+    for v in range(n):
+        qoff[v + 1] += qoff[v]
+    fill = qoff[:-1].copy()
+    qidx = np.empty(2 * q, dtype=np.int64)
+    for i in range(q):
+        qidx[fill[us[i]]] = i
+        fill[us[i]] += 1
+        qidx[fill[vs[i]]] = i
+        fill[vs[i]] += 1
+
+    uf = np.arange(n)
+    anc = np.arange(n)
+    parent = np.full(n, -1, dtype=np.int64)
+    it = offsets[:-1].copy()
+    state = np.zeros(n, dtype=np.int8)  # 0: 未訪問, 1: 探索中, 2: 探索済み
+    ret = np.full(q, -1, dtype=np.int32)
+    stack = np.empty(n, dtype=np.int64)
+    stack[0] = root
+    top = 1
+    state[root] = 1
+    while top > 0:
+        v = stack[top - 1]
+        if it[v] < offsets[v + 1]:
+            nv = targets[it[v]]
+            it[v] += 1
+            if state[nv] == 0:
+                parent[nv] = v
+                state[nv] = 1
+                stack[top] = nv
+                top += 1
+            continue
+        top -= 1
+        state[v] = 2
+        for j in range(qoff[v], qoff[v + 1]):
+            i = qidx[j]
+            w = vs[i] if us[i] == v else us[i]
+            if state[w] == 2:
+                ret[i] = anc[_find(uf, w)]
+        p = parent[v]
+        if p >= 0:
+            rp, rv = _find(uf, p), _find(uf, v)
+            uf[rv] = rp
+            anc[rp] = p
+    return ret
+
+
+class FastLCA():
+    """
+    木の最小共通祖先をオイラーツアー(DFSの行きがけ順)+sparse tableでO(1)で求める。
+    前処理はO(nlogn)で、非再帰のDFSでnp.int32の配列上に構築するので10^6頂点のパスグラフでも落ちない。
+    使い方はLCAと同じで、頂点番号が0, 1, ..., n-1で与えられた木のrepnを入力としてインスタンス化し、
+    lca(u, v)で最小共通祖先を返す。
+    u != vかつtin[u] < tin[v]のとき、行きがけ順で(tin[u], tin[v]]にある頂点の親のうち
+    訪問時刻が最小のものがLCAになることを利用している。
+    参考：https://codeforces.com/blog/entry/74847
+    """
+    def __init__(self, repn, root=0):
+        assert root >= 0
+        self.n = len(repn)
+        self.offsets, self.targets, _ = as_csr(repn)
+        self.order = None  # order[t] = (t番目に訪れた頂点)
+        self.tin = None  # tin[v] = (頂点vを訪れた時刻)
+        self.parent = None
+        self.depth = None
+        self.table = None
+        self.levels = None  # kth_ancestor_many用に遅延構築する
+        self.root = root
+        self.reroot(root)
+
+    def reroot(self, r=None):
+        """
+        Reroot the tree from r.
+        If r is None, r is set to be an endpoint of a diameter of the tree.
+        """
+        self.root = self.farthest_vertex() if r is None else r
+        self.order, self.tin, self.parent, self.depth = _dfs_preorder(self.offsets, self.targets, self.root)
+        self.table = _build_sparse_table(self.order, self.tin, self.parent)
+        self.levels = None
+
+    def farthest_vertex(self):
+        """Return a farthest vertex from self.root"""
+        return int(np.argmax(self.depth))
+
+    def __call__(self, u, v):
+        """
+        Return LCA of u and v
+        """
+        if u == v: return u
+        l, r = int(self.tin[u]), int(self.tin[v])
+        if l > r: l, r = r, l
+        l += 1
+        r += 1
+        k = (r - l).bit_length() - 1
+        return int(self.order[min(self.table[k, l], self.table[k, r - (1 << k)])])
+
+    def dist(self, u, v):
+        """Return the number of edges between u and v"""
+        return int(self.depth[u] + self.depth[v] - 2 * self.depth[self(u, v)])
+
+    def lca_many(self, us, vs):
+        """各iについてus[i]とvs[i]のLCAを並べたnp.int32の配列を返す"""
+        us = np.asarray(us, dtype=np.int64)
+        vs = np.asarray(vs, dtype=np.int64)
+        return _lca_many(self.table, self.tin, self.order, us, vs)
+
+    def dist_many(self, us, vs):
+        """各iについてus[i]とvs[i]の距離を並べた配列を返す"""
+        us = np.asarray(us, dtype=np.int64)
+        vs = np.asarray(vs, dtype=np.int64)
+        w = self.lca_many(us, vs)
+        return self.depth[us] + self.depth[vs] - 2 * self.depth[w]
+
+    def kth_ancestor_many(self, vs, ks):
+        """各iについてvs[i]のks[i]個上の祖先を並べた配列を返す（存在しなければ-1）"""
+        if self.levels is None:
+            self.levels = _build_levels(self.tin, self.depth, self.order)
+        vs = np.asarray(vs, dtype=np.int64)
+        ks = np.asarray(ks, dtype=np.int64)
+        return _kth_ancestor_many(self.tin, self.depth, self.order, *self.levels, vs, ks)
+
+    def offline_lca(self, us, vs):
+        """lca_manyと同じ結果をTarjanのオフラインLCAで求める（sparse tableを使わない）"""
+        us = np.asarray(us, dtype=np.int64)
+        vs = np.asarray(vs, dtype=np.int64)
+        return offline_lca(self.offsets, self.targets, self.root, us, vs)
+
+
+@njit
+def op_max(a, b): return max(a, b)
+
+
+@njit
+def op_min(a, b): return min(a, b)
+
+
+@njit
+def op_add(a, b): return a + b
+
+
+@njit(cache=True)
+def _parent_weights(offsets, targets, weights, parent):
+    """up[v] = (vと親を結ぶ辺の重み)。根では0"""
+    n = parent.shape[0]
+    up = np.zeros(n, dtype=np.int64)
+    for v in range(n):
+        for i in range(offsets[v], offsets[v + 1]):
+            if targets[i] == parent[v]:
+                up[v] = weights[i]
+                break
+    return up
+
+
+@njit
+def _build_lifting(parent, up_weight, op, e):
+    """
+    jump[k][v] = (vから2^k上の祖先), agg[k][v] = (その間の辺の重みをopで集約したもの)
+    祖先が存在しない場合はjump = -1, agg = e。
+    """
+    n = parent.shape[0]
+    log = 1
+    while (1 << log) < n:
+        log += 1
+    jump = np.full((log, n), -1, dtype=np.int32)
+    agg = np.full((log, n), e, dtype=np.int64)
+    for v in range(n):
+        if parent[v] >= 0:
+            jump[0, v] = parent[v]
+            agg[0, v] = up_weight[v]
+    for k in range(log - 1):
+        for v in range(n):
+            m = jump[k, v]
+            if m >= 0:
+                jump[k + 1, v] = jump[k, m]
+                agg[k + 1, v] = op(agg[k, v], agg[k, m])
+    return jump, agg
+
+
+@njit
+def _climb(jump, agg, v, d, op, e):
+    """vからd本の辺を上る間の集約値を返す"""
+    ret = e
+    k = 0
+    while d > 0:
+        if d & 1:
+            ret = op(ret, agg[k, v])
+            v = jump[k, v]
+        d >>= 1
+        k += 1
+    return ret
+
+
+@njit
+def _path_aggregate_many(jump, agg, depth, lcas, us, vs, op, e):
+    ret = np.empty(us.shape[0], dtype=np.int64)
+    for i in range(us.shape[0]):
+        u, v, w = us[i], vs[i], lcas[i]
+        ret[i] = op(_climb(jump, agg, u, depth[u] - depth[w], op, e),
+                    _climb(jump, agg, v, depth[v] - depth[w], op, e))
+    return ret
+
+
+class PathAggregateLCA(FastLCA):
+    """
+    辺に重みの付いた木で、u-vパス上の辺の重みの集約値(max, min, sumなど)をO(logn)で求める。
+    ダブリングの表jump[k][v]と一緒に、その2^k本の辺の重みをモノイド(op, e)で集約した値agg[k][v]を持つ。
+    LCAはFastLCAでO(1)で求め、uとvからそれぞれLCAまで上る。
+    opは可換なnjit関数であること（op_max, op_min, op_addを用意してある）。
+    weightsはrepnと同じ形で、weights[v][i]は辺(v, repn[v][i])の重み。
+    repnが重み付きのCSRGraphならweightsは省略できる。
+    使用例：
+        pa = PathAggregateLCA(repn, weights, op_max, -(1 << 62))
+        print(pa.query(u, v))  # u-vパス上の辺の重みの最大値
+    """
+    def __init__(self, repn, weights=None, op=op_max, e=-(1 << 62), root=0):
+        self.op = op
+        self.e = e
+        self.weights = as_csr(repn, weights)[2]
+        assert self.weights is not None, "edge weights are required"
+        self.jump = None
+        self.agg = None
+        super().__init__(repn, root)
+
+    def reroot(self, r=None):
+        super().reroot(r)
+        up_weight = _parent_weights(self.offsets, self.targets, self.weights, self.parent)
+        self.jump, self.agg = _build_lifting(self.parent, up_weight, self.op, self.e)
+
+    def query(self, u, v):
+        """u-vパス上の辺の重みの集約値を返す（u == vならe）"""
+        return int(self.query_many(np.array([u]), np.array([v]))[0])
+
+    def query_many(self, us, vs):
+        """各iについてus[i]-vs[i]パス上の辺の重みの集約値を並べた配列を返す"""
+        us = np.asarray(us, dtype=np.int64)
+        vs = np.asarray(vs, dtype=np.int64)
+        lcas = self.lca_many(us, vs)
+        return _path_aggregate_many(self.jump, self.agg, self.depth, lcas, us, vs, self.op, self.e)
@@ -0,0 +1,174 @@
+"""
+最小費用流のライブラリ。
+逐次最短路法（primal-dual）で、各頂点のポテンシャルで辺の費用を非負に補正しながら
+二分ヒープのDijkstra法で最短路を求めて流す。計算量はO(F(n + m)logn)（Fは流量）。
+辺はDinic.NumbaDinicと同じくCSR順に並べたnp.int64の配列(to, cap, rev, cost)で持ち、
+flow/slopeの呼び出し時にまとめて組み立てる。全ての辺の費用は非負であること。
+使用例：
+    mcf = MinCostFlow(4)
+    e = mcf.add_edge(0, 1, 2, 3)              # 容量2, 費用3の辺。辺番号が返る
+    mcf.add_edges(us, vs, caps, costs)        # まとめて追加（いずれも配列）
+    print(mcf.flow(0, 3, 5))                  # 流量5を上限に流したときの(流量, 費用)
+    print(mcf.slope(0, 3))                    # 流量と最小費用の関係の折れ線の頂点を並べた(k, 2)の配列
+    print(mcf.edge_flow(e))
+参考：https://github.com/atcoder/ac-library/blob/master/atcoder/mincostflow.hpp
+"""
+import heapq
+
+import numpy as np
+from numba import njit
+
+from Dinic import _build_arcs, INF
+
+
+@njit(cache=True)
+def _slope(offsets, to, cap, rev, cost, dual, s, t, flow_limit):
+    """
+    sからtへflow_limitを上限に流し、折れ線の頂点(流量, 費用)を並べた配列を返す。
+    dualは前回の呼び出しから引き継ぐポテンシャル。
+    """
+    n = offsets.shape[0] - 1
+    dist = np.empty(n, dtype=np.int64)
+    prev_e = np.empty(n, dtype=np.int64)
+    vis = np.zeros(n, dtype=np.bool_)
+    ret = np.zeros((16, 2), dtype=np.int64)
+    k = 1
+    flow = 0
+    total = 0
+    prev_cost_per_flow = -1
+    while flow < flow_limit:
+        # 補正した費用 cost[e] - dual[w] + dual[v] (>= 0) でのDijkstra
+        dist[:] = INF
+        vis[:] = False
+        dist[s] = 0
+        heap = [(0, s)]
+        while heap:
+            d, v = heapq.heappop(heap)
+            if vis[v]:
+                continue
+            vis[v] = True
+            if v == t:
+                break
+            for e in range(offsets[v], offsets[v + 1]):
+                if cap[e] == 0:
+                    continue
+                w = to[e]
+                nd = d + cost[e] - dual[w] + dual[v]
+                if nd < dist[w]:
+                    dist[w] = nd
+                    prev_e[w] = e
+                    heapq.heappush(heap, (nd, w))
+        if not vis[t]:
+            break
+        # 確定した頂点だけポテンシャルを更新する（未確定の頂点はdist[t]以上なので補正後の費用は非負のまま）
+        for v in range(n):
+            if vis[v]:
+                dual[v] -= dist[t] - dist[v]
+
+        c = flow_limit - flow
+        v = t
+        while v != s:
+            e = prev_e[v]
+            c = min(c, cap[e])
+            v = to[rev[e]]
+        v = t
+        while v != s:
+            e = prev_e[v]
+            cap[e] -= c
+            cap[rev[e]] += c
+            v = to[rev[e]]
+
+        d = -dual[s]
+        flow += c
+        total += c * d
+        if prev_cost_per_flow == d:
+            k -= 1  # 傾きが変わらなければ直前の頂点を上書きする
+        if k == ret.shape[0]:
+            buf = np.zeros((2 * k, 2), dtype=np.int64)
+            buf[:k] = ret
+            ret = buf
+        ret[k, 0] = flow
+        ret[k, 1] = total
+        k += 1
+        prev_cost_per_flow = d
+    return ret[:k].copy()
+
+
+class MinCostFlow:
+    """
+    頂点数nの有向グラフの最小費用流。
+    flow/slopeは残余グラフとポテンシャルを引き継ぐので、続けて呼ぶと前回の続きから流す
+    （返り値はその呼び出しで増えた分）。一度flow/slopeを呼んだ後に辺を追加することはできない。
+    """
+    def __init__(self, n):
+        self.n = n
+        self.m = 0
+        self.offsets = self.to = self.cap = self.rev = self.pos = self.cost = None
+        self.dual = np.zeros(n, dtype=np.int64)
+        self._chunks = []
+        self._single = ([], [], [], [])
+
+    def add_edge(self, _from, to, cap, cost):
+        """容量cap, 単位流量あたりの費用costの辺を追加して辺番号を返す"""
+        assert self.offsets is None, "edges cannot be added after flow() or slope()"
+        assert cost >= 0
+        fr, dst, caps, costs = self._single
+        fr.append(_from)
+        dst.append(to)
+        caps.append(cap)
+        costs.append(cost)
+        self.m += 1
+        return self.m - 1
+
+    def add_edges(self, froms, tos, caps, costs):
+        """辺をまとめて追加して、最初の辺番号を返す"""
+        assert self.offsets is None, "edges cannot be added after flow() or slope()"
+        self._flush_single()
+        arrs = tuple(np.asarray(a, dtype=np.int64) for a in (froms, tos, caps, costs))
+        assert arrs[0].shape == arrs[1].shape == arrs[2].shape == arrs[3].shape
+        assert np.all(arrs[3] >= 0)
+        self._chunks.append(arrs)
+        first = self.m
+        self.m += arrs[0].shape[0]
+        return first
+
+    def _flush_single(self):
+        if self._single[0]:
+            self._chunks.append(tuple(np.array(a, dtype=np.int64) for a in self._single))
+            self._single = ([], [], [], [])
+
+    def _build(self):
+        if self.offsets is not None:
+            return
+        self._flush_single()
+        if self._chunks:
+            self.fr, self.dst, self.cap0, costs = (np.concatenate(arrs) for arrs in zip(*self._chunks))
+        else:
+            self.fr = self.dst = self.cap0 = costs = np.zeros(0, dtype=np.int64)
+        self._chunks = []
+        self.offsets, self.to, self.cap, self.rev, self.pos = _build_arcs(
+            self.n, self.fr, self.dst, self.cap0, np.zeros_like(self.cap0))
+        self.cost = np.empty(2 * self.m, dtype=np.int64)
+        self.cost[self.pos] = costs
+        self.cost[self.rev[self.pos]] = -costs
+
+    def slope(self, s, t, flow_limit=INF):
+        """
+        流量xに対する最小費用は区分線形な凸関数になる。その折れ線の頂点(流量, 費用)を
+        流量の昇順に並べた(k, 2)のnp.int64の配列を返す（先頭は(0, 0)）。
+        """
+        assert 0 <= s < self.n and 0 <= t < self.n
+        assert s != t, "s and t must be different"
+        self._build()
+        return _slope(self.offsets, self.to, self.cap, self.rev, self.cost, self.dual, s, t, flow_limit)
+
+    def flow(self, s, t, flow_limit=INF):
+        """sからtへflow_limitを上限に流せるだけ流し、(流量, 費用)を返す"""
+        f, c = self.slope(s, t, flow_limit)[-1]
+        return int(f), int(c)
+
+    def edge_flow(self, k=None):
+        """辺kに流れている流量を返す。kを省略すると全ての辺の流量の配列を返す"""
+        self._build()
+        flows = self.cap0 - self.cap[self.pos]
+        return flows if k is None else int(flows[k])
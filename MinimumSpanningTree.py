@@ -0,0 +1,149 @@
+"""
+最小全域森のライブラリ。辺(us[i], vs[i], 重みws[i])の配列を受け取り、
+最小全域森に使う辺の番号の配列と重みの合計を返す。重みは整数でも浮動小数点数でもよく、合計はwsと同じ型で求める。
+    kruskal : 重みをnp.argsortで並べ、UnionFindTree.UnionFindで閉路を作らない辺を採る。O(mlogm)
+    boruvka : 各連結成分から出る最小の辺を全て採ることを繰り返す。O(mlogn)
+              1周ごとに連結成分を1頂点に縮約した辺の配列を作り直すので、1周の手間は残っている辺と連結成分の個数に比例する
+              辺の走査はスレッド数個のチャンクに分けてprangeで並列に行う
+重みが等しい辺は番号の小さい方を優先するので、どちらも同じ辺の集合を返す。
+nの代わりに重み付きのGraph.CSRGraphを渡してもよい（辺の番号はgraph.edges()の順。無向グラフなら各辺が2回現れるが結果は変わらない）。
+使用例：
+    edges, total = kruskal(n, us, vs, ws)
+    edges, total = boruvka(n, us, vs, ws)
+"""
+import numpy as np
+from numba import njit, prange, get_num_threads
+
+from Graph import CSRGraph
+from UnionFindTree import UnionFind
+
+
+@njit(cache=True)
+def _kruskal(n, us, vs, ws, order):
+    uf = UnionFind(n)
+    ret = np.empty(max(n - 1, 0), dtype=np.int64)
+    k = 0
+    total = ws[:0].sum()  # wsと同じ型の0
+    for e in order:
+        if k == n - 1:
+            break
+        if uf.union(us[e], vs[e]):
+            ret[k] = e
+            k += 1
+            total += ws[e]
+    return ret[:k].copy(), total
+
+
+@njit(parallel=True, cache=True)
+def _cheapest_edges(cu, cv, cw, eid, num_comp, num_chunks):
+    """
+    縮約したグラフの各頂点（連結成分）について、そこから出る辺のうち(重み, 番号)が最小のものの位置を返す（なければ-1）。
+    辺をチャンクに分けてチャンクごとに最小値を求め、最後にまとめる。
+    """
+    m = cu.shape[0]
+    best = np.full((num_chunks, num_comp), -1, dtype=np.int64)
+    chunk = (m + num_chunks - 1) // num_chunks
+    for c in prange(num_chunks):
+        b = best[c]
+        for i in range(c * chunk, min((c + 1) * chunk, m)):
+            for x in (cu[i], cv[i]):
+                f = b[x]
+                if f < 0 or cw[i] < cw[f] or (cw[i] == cw[f] and eid[i] < eid[f]):
+                    b[x] = i
+    ret = best[0].copy()
+    for c in range(1, num_chunks):
+        for x in range(num_comp):
+            f, i = ret[x], best[c, x]
+            if i >= 0 and (f < 0 or cw[i] < cw[f] or (cw[i] == cw[f] and eid[i] < eid[f])):
+                ret[x] = i
+    return ret
+
+
+@njit(cache=True)
+def _boruvka(n, us, vs, ws, num_chunks):
+    ret = np.empty(max(n - 1, 0), dtype=np.int64)
+    k = 0
+    total = ws[:0].sum()  # wsと同じ型の0
+    # 連結成分を1頂点に縮約したグラフの辺(cu[i], cv[i], 重みcw[i], 元の番号eid[i])
+    cu = us.copy()
+    cv = vs.copy()
+    cw = ws.copy()
+    eid = np.arange(us.shape[0])
+    m = us.shape[0]
+    num_comp = n
+    while True:
+        # 自己ループになった辺を捨てて詰める
+        j = 0
+        for i in range(m):
+            if cu[i] != cv[i]:
+                cu[j], cv[j], cw[j], eid[j] = cu[i], cv[i], cw[i], eid[i]
+                j += 1
+        m = j
+        if m == 0:
+            break
+        best = _cheapest_edges(cu[:m], cv[:m], cw[:m], eid[:m], num_comp, min(num_chunks, m))
+        # 縮約したグラフの上だけでUnionFindを使うので、1周の手間はO(m + 連結成分の個数)
+        uf = UnionFind(num_comp)
+        for x in range(num_comp):
+            i = best[x]
+            if i >= 0 and uf.union(cu[i], cv[i]):
+                ret[k] = eid[i]
+                k += 1
+                total += cw[i]
+        comp = uf.labels()
+        num_comp = comp.max() + 1
+        for i in range(m):
+            cu[i] = comp[cu[i]]
+            cv[i] = comp[cv[i]]
+    return np.sort(ret[:k]), total
+
+
+def _edge_arrays(n, us, vs, ws):
+    if isinstance(n, CSRGraph):
+        graph = n
+        n = graph.n
+        us, vs, ws = graph.edges()
+    assert ws is not None, "edge weights are required"
+    us = np.asarray(us, dtype=np.int64)
+    vs = np.asarray(vs, dtype=np.int64)
+    ws = np.asarray(ws)
+    assert np.issubdtype(ws.dtype, np.number), "edge weights must be numbers"
+    assert us.shape == vs.shape == ws.shape
+    return n, us, vs, ws
+
+
+def kruskal(n, us=None, vs=None, ws=None):
+    """
+    Kruskal法で最小全域森を求め、(採った辺の番号の配列（重みの昇順）, 重みの合計)を返す
+    """
+    n, us, vs, ws = _edge_arrays(n, us, vs, ws)
+    order = np.argsort(ws, kind='stable')
+    return _kruskal(n, us, vs, ws, order)
+
+
+def boruvka(n, us=None, vs=None, ws=None, num_chunks=None):
+    """
+    Borůvka法で最小全域森を求め、(採った辺の番号の配列（昇順）, 重みの合計)を返す
+    num_chunksは辺の走査を分けるチャンクの数で、省略するとnumbaのスレッド数になる
+    """
+    n, us, vs, ws = _edge_arrays(n, us, vs, ws)
+    if num_chunks is None:
+        num_chunks = get_num_threads()
+    return _boruvka(n, us, vs, ws, max(num_chunks, 1))
+
+
+if __name__ == '__main__':
+    """ランダムなグラフで2つの方法の速度を比べる"""
+    import time
+
+    kruskal(2, [0], [1], [1])
+    boruvka(2, [0], [1], [1])
+    n, m = 10 ** 6, 10 ** 7
+    rng = np.random.default_rng(0)
+    us = rng.integers(0, n, m)
+    vs = rng.integers(0, n, m)
+    ws = rng.integers(0, 10 ** 9, m)
+    for name, f in (("kruskal", kruskal), ("boruvka", boruvka)):
+        start = time.perf_counter()
+        edges, total = f(n, us, vs, ws)
+        print(f"{name}: {edges.shape[0]} edges, total={total}, {time.perf_counter() - start:.3f}s")
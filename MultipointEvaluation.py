@@ -0,0 +1,159 @@
+"""
+subproduct treeによる多点評価と多項式補間のライブラリ。NTT-friendlyな素数mod上で
+    multipoint_evaluation(f, xs)       : [f(x) for x in xs] をO(nlog^2n)で求める
+    polynomial_interpolation(xs, ys)   : f(xs[i]) = ys[i]となる次数len(xs)-1以下のfをO(nlog^2n)で求める
+入出力はnp.int64の配列。
+subproduct treeの各ノードには担当する点xiについての積Π(x - xi)を持たせる。
+葉の近く（担当する点がBLOCK個以下）は木を作らずに愚直に計算し、
+木を根から下りる際には使い終わったノードの多項式をすぐに捨ててメモリのピークを抑える。
+参考：https://37zigen.com/multipoint-evaluation/
+"""
+import numpy as np
+from numba import njit
+
+from Convolution import convolve_mod, pow_mod
+from FormalPowerSeries import fps_inv, DEFAULT_MOD
+
+
+BLOCK = 32
+
+
+@njit(cache=True)
+def _poly_mod(a, b, mod):
+    """多項式aをモニックな多項式bで割った余りを返す（長さはlen(b) - 1）"""
+    la, lb = a.shape[0], b.shape[0]
+    if la < lb:
+        ret = np.zeros(lb - 1, dtype=np.int64)
+        ret[:la] = a
+        return ret
+    n = la - lb + 1  # 商の長さ
+    if min(n, lb) <= BLOCK:
+        r = a.copy()
+        for i in range(la - 1, lb - 2, -1):
+            c = r[i]
+            if c == 0:
+                continue
+            for j in range(lb):
+                r[i - lb + 1 + j] = (r[i - lb + 1 + j] - c * b[j]) % mod
+        return r[:lb - 1].copy()
+    # 反転した多項式の上で a / b = a * (1/b) mod x^n を計算する
+    q = convolve_mod(a[::-1][:n].copy(), fps_inv(b[::-1].copy(), n, mod), mod)[:n][::-1].copy()
+    qb = convolve_mod(q, b, mod)
+    return (a[:lb - 1] - qb[:lb - 1]) % mod
+
+
+@njit(cache=True)
+def _build_tree(xs, mod):
+    """
+    subproduct treeを作る。
+    tree[v]はヒープ状に並べたノードvの多項式で、ブロックはtree[nb + j]に入る(0 <= j < nb)。
+    """
+    m = xs.shape[0]
+    nb = 1
+    while nb * BLOCK < m:
+        nb <<= 1
+    tree = [np.ones(1, dtype=np.int64) for _ in range(2 * nb)]
+    for j in range(nb):
+        lo, hi = min(j * BLOCK, m), min((j + 1) * BLOCK, m)
+        P = np.zeros(hi - lo + 1, dtype=np.int64)
+        P[0] = 1
+        for k in range(lo, hi):
+            # P *= (x - xs[k])
+            for i in range(k - lo + 1, 0, -1):
+                P[i] = (P[i - 1] - xs[k] * P[i]) % mod
+            P[0] = (mod - xs[k]) * P[0] % mod
+        tree[nb + j] = P
+    for v in range(nb - 1, 0, -1):
+        tree[v] = convolve_mod(tree[2 * v], tree[2 * v + 1], mod)
+    return tree, nb
+
+
+@njit(cache=True)
+def _evaluate_tree(f, xs, tree, nb, free_tree, mod):
+    """
+    根から順に余りを取って木を下り、ブロックに着いたらHorner法で評価する。
+    free_tree=Trueなら使い終わったノードの多項式を捨てる。
+    """
+    m = xs.shape[0]
+    empty = np.zeros(0, dtype=np.int64)
+    rem = [empty for _ in range(2 * nb)]
+    rem[1] = _poly_mod(f, tree[1], mod)
+    if free_tree:
+        tree[1] = empty
+    for v in range(1, nb):
+        for c in (2 * v, 2 * v + 1):
+            rem[c] = _poly_mod(rem[v], tree[c], mod)
+            if free_tree:
+                tree[c] = empty
+        rem[v] = empty
+    ret = np.zeros(m, dtype=np.int64)
+    for j in range(nb):
+        r = rem[nb + j]
+        for k in range(min(j * BLOCK, m), min((j + 1) * BLOCK, m)):
+            val = 0
+            for i in range(r.shape[0] - 1, -1, -1):
+                val = (val * xs[k] + r[i]) % mod
+            ret[k] = val
+        rem[nb + j] = empty
+    return ret
+
+
+@njit(cache=True)
+def multipoint_evaluation(f, xs, mod=DEFAULT_MOD):
+    """多項式fのxs上の各点での値を返す"""
+    xs = xs % mod
+    if xs.shape[0] == 0:
+        return np.zeros(0, dtype=np.int64)
+    tree, nb = _build_tree(xs, mod)
+    return _evaluate_tree(f % mod, xs, tree, nb, True, mod)
+
+
+@njit(cache=True)
+def polynomial_interpolation(xs, ys, mod=DEFAULT_MOD):
+    """
+    相異なる点xsで値ysを取る次数len(xs) - 1以下の多項式の係数を返す。
+    M(x) = Π(x - xi)として f(x) = Σ yi / M'(xi) * M(x) / (x - xi) を、
+    葉側から w_L * M_R + w_R * M_L と足し上げて求める。
+    """
+    xs = xs % mod
+    m = xs.shape[0]
+    if m == 0:
+        return np.zeros(0, dtype=np.int64)
+    tree, nb = _build_tree(xs, mod)
+    M = tree[1]
+    dM = np.zeros(m, dtype=np.int64)
+    for i in range(1, m + 1):
+        dM[i - 1] = M[i] * i % mod
+    w = _evaluate_tree(dM, xs, tree, nb, False, mod)
+    for k in range(m):
+        assert w[k] != 0, "xs must be pairwise distinct"
+        w[k] = ys[k] % mod * pow_mod(w[k], mod - 2, mod) % mod
+
+    vals = [np.zeros(0, dtype=np.int64) for _ in range(2 * nb)]
+    for j in range(nb):
+        P = tree[nb + j]
+        lo, hi = min(j * BLOCK, m), min((j + 1) * BLOCK, m)
+        acc = np.zeros(max(hi - lo, 1), dtype=np.int64)
+        for k in range(lo, hi):
+            # P / (x - xs[k]) を組立除法で求めてw[k]倍して足す
+            c = 0
+            for i in range(hi - lo, 0, -1):
+                c = (P[i] + c * xs[k]) % mod
+                acc[i - 1] = (acc[i - 1] + w[k] * c) % mod
+        vals[nb + j] = acc
+    for v in range(nb - 1, 0, -1):
+        L, R = 2 * v, 2 * v + 1
+        a = convolve_mod(vals[L], tree[R], mod)
+        b = convolve_mod(vals[R], tree[L], mod)
+        n = max(a.shape[0], b.shape[0])
+        s = np.zeros(n, dtype=np.int64)
+        s[:a.shape[0]] += a
+        s[:b.shape[0]] += b
+        vals[v] = s % mod
+        empty = np.zeros(0, dtype=np.int64)
+        vals[L], vals[R] = empty, empty
+        tree[L], tree[R] = empty, empty
+    ret = np.zeros(m, dtype=np.int64)
+    k = min(m, vals[1].shape[0])
+    ret[:k] = vals[1][:k]
+    return ret
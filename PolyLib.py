@@ -1,10 +1,125 @@
+from itertools import chain
+
+import numpy as np
+from numba import njit
+
+from Convolution import convolve, convolve_mod, ntt, ntt_primitive_root, pow_mod
+
+
+@njit(cache=True)
+def bostan_mori(P, Q, Ns, mod):
+    """
+    形式的冪級数P(x)/Q(x)のx^N (N in Ns)における係数をまとめて求める（mod < 2^31, Q[0] = 1）。
+    Bostan-Moriのアルゴリズムを非再帰で書いたもの。各段階で
+        P(x)/Q(x) = P(x)Q(-x) / Q(x)Q(-x) = (Ue(x^2) + xUo(x^2)) / V(x^2)
+    としてNの偶奇に応じてUeかUoを残し、N -> N // 2とする。
+    分母Vの計算とQ(-x)のNTTは全てのNで共通なので1回だけ行う。
+    d = deg Q, k = len(Ns)としてO((k + 1) dlogdlogN)。
+    """
+    Q = Q % mod
+    d = Q.shape[0] - 1
+    k = Ns.shape[0]
+    lp = P.shape[0]
+    width = max(lp, d, 1)
+    nums = np.zeros((k, width), dtype=np.int64)
+    for i in range(k):
+        nums[i, :lp] = P % mod
+    ns = Ns.copy()
+    ret = np.zeros(k, dtype=np.int64)
+    active = 0
+    for i in range(k):
+        if ns[i] == 0:
+            ret[i] = nums[i, 0]
+        else:
+            active += 1
+
+    Qm = np.empty(d + 1, dtype=np.int64)
+    while active > 0:
+        for i in range(d + 1):
+            Qm[i] = (mod - Q[i]) % mod if i & 1 else Q[i]
+        # 分子の積 U = P(x)Q(-x) は、NTTが使えるならQ(-x)の変換結果を使い回す
+        size = 1
+        while size < lp + d:
+            size <<= 1
+        g = ntt_primitive_root(mod, size) if active > 1 else 0
+        fq = np.zeros(size, dtype=np.int64)
+        if g > 0:
+            fq[:d + 1] = Qm
+            ntt(fq, mod, g, False)
+        buf = np.empty(size, dtype=np.int64)
+        for i in range(k):
+            if ns[i] == 0:
+                continue
+            if g > 0:
+                buf[:lp] = nums[i, :lp]
+                buf[lp:] = 0
+                ntt(buf, mod, g, False)
+                for j in range(size):
+                    buf[j] = buf[j] * fq[j] % mod
+                ntt(buf, mod, g, True)
+                U = buf[:lp + d]
+            else:
+                U = convolve_mod(nums[i, :lp], Qm, mod)
+            parity = ns[i] & 1
+            m = (lp + d - parity + 1) // 2
+            nums[i, :m] = U[parity::2]
+            nums[i, m:] = 0
+            ns[i] >>= 1
+            if ns[i] == 0:
+                ret[i] = nums[i, 0]
+                active -= 1
+        lp = min((lp + d + 1) // 2, width)
+        Q = convolve_mod(Q, Qm, mod)[::2].copy()
+    return ret
+
+
+@njit(cache=True)
+def berlekamp_massey(A, mod):
+    """
+    数列Aの先頭から、これを生成する最短の線形漸化式
+        a_n = c_1 * a_{n-1} + c_2 * a_{n-2} + ... + c_d * a_{n-d}
+    の係数C = [c_1, ..., c_d]をBerlekamp-Massey法でO(len(A)^2)で求める（modは2^31未満の素数）。
+    次数dの漸化式を確定させるには先頭2d項が必要。
+    参考：https://mathworld.wolfram.com/Berlekamp-MasseyAlgorithm.html
+    """
+    n = A.shape[0]
+    A = A % mod
+    # C(x) = 1 + C[1]x + ... が現在の接続多項式、B(x)は最後に長さが変わる直前のもの
+    C = np.zeros(n + 1, dtype=np.int64)
+    B = np.zeros(n + 1, dtype=np.int64)
+    T = np.zeros(n + 1, dtype=np.int64)
+    C[0] = B[0] = 1
+    L, LB, m, b = 0, 0, 1, 1  # LBはB(x)の次数
+    for i in range(n):
+        d = A[i]
+        for j in range(1, L + 1):
+            d = (d + C[j] * A[i - j]) % mod
+        if d == 0:
+            m += 1
+            continue
+        coef = d * pow_mod(b, mod - 2, mod) % mod
+        if 2 * L <= i:
+            T[:L + 1] = C[:L + 1]
+            for j in range(m, min(m + LB, n) + 1):
+                C[j] = (C[j] - coef * B[j - m]) % mod
+            L, LB, b, m = i + 1 - L, L, d, 1
+            B, T = T, B
+        else:
+            for j in range(m, min(m + LB, n) + 1):
+                C[j] = (C[j] - coef * B[j - m]) % mod
+            m += 1
+    return (mod - C[1:L + 1]) % mod
+
+
 class PolyLib():
     """
     線形漸化式を求めるためのライブラリ。と言っても実態は多項式操作の関数群。
     漸化式がどの体上で定義されているかによって加算と乗算は適切に定義する必要がある。
     クラスにまとめるのにラムダ式を使ったせいでだいぶ遅くなってることに注意。
+    ただし多項式の積はConvolution.convolveに任せているので、どのmodでもO(nlogn)で計算できる。
     """
     def __init__(self, mod=None):
+        self.mod = mod
         if mod is None:
             self.add = lambda x, y: x + y
             self.sub = lambda x, y: x - y
@@ -24,6 +139,19 @@ class PolyLib():
         """多項式PとQの積をd次まで計算する。dを指定しなければP*Qは最高次まで求める"""
         assert P and Q, "Inputs must not be empty, but given P = {}, Q = {}".format(P, Q)
         if d is None: d = len(P) + len(Q) - 2  # 桁が膨れ上がる場合はここをtruncateする
+        P, Q = P[:d + 1], Q[:d + 1]
+        if not all(isinstance(x, (int, np.integer)) for x in chain(P, Q)):
+            # 有理数や浮動小数点数の係数はNTTに載せられないので愚直に計算する
+            return self.polymul_naive(P, Q, d)
+        ret = convolve([int(x) for x in P], [int(x) for x in Q], self.mod)
+        if len(ret) > d + 1:
+            del ret[d + 1:]
+        return self.diminish_zero(ret)
+
+    def polymul_naive(self, P, Q, d=None):
+        """polymulをO(d^2)で愚直に計算する。検算用"""
+        assert P and Q, "Inputs must not be empty, but given P = {}, Q = {}".format(P, Q)
+        if d is None: d = len(P) + len(Q) - 2
         ret = [0] * (d + 1)
         for n in range(d + 1):
             coeff = 0
@@ -64,23 +192,36 @@ class PolyLib():
 
 
     def get_coeff(self, P, Q, n):
-        """形式的冪級数P(x)/Q(x)のx^nにおける係数を求める"""
+        """
+        形式的冪級数P(x)/Q(x)のx^nにおける係数を求める。
+        nにリストを渡すと各nに対する係数をリストで返す（分母の計算は共有される）。
+        mod < 2^31ならbostan_moriで配列上で計算し、そうでなければ多倍長整数のリストで同じことをする。
+        """
         assert Q[0] == 1, "The constant term of denominator must be 1, but given, {}".format(Q[0])
-        assert n >= 0, "n must be non-negative, but given {}".format(n)
-        if n == 0: return P[0]
+        batch = isinstance(n, (list, tuple))
+        Ns = list(n) if batch else [n]
+        for N in Ns:
+            assert N >= 0, "n must be non-negative, but given {}".format(N)
 
-        Q_trans = [0] * len(Q)
-        for i, q in enumerate(Q):
-            if i % 2 == 0:
-                Q_trans[i] = q
-            else:
-                Q_trans[i] = -q
-        V = self.reduce_even(self.polymul(Q, Q_trans))
-        Ue, Uo = self.divide_even_odd(self.polymul(P, Q_trans))
-        if n % 2 == 0:
-            return self.get_coeff(Ue, V, n // 2)
+        if self.mod is not None and self.mod < (1 << 31):
+            ret = bostan_mori(np.array([p % self.mod for p in P], dtype=np.int64),
+                              np.array([q % self.mod for q in Q], dtype=np.int64),
+                              np.array(Ns, dtype=np.int64), self.mod).tolist()
         else:
-            return self.get_coeff(Uo, V, (n - 1) // 2)
+            ret = [None] * len(Ns)
+            nums = [P] * len(Ns)
+            for i, N in enumerate(Ns):
+                if N == 0: ret[i] = P[0]
+            while any(N > 0 for N in Ns):
+                Q_trans = [q if i % 2 == 0 else -q for i, q in enumerate(Q)]
+                for i, N in enumerate(Ns):
+                    if N == 0: continue
+                    Ue, Uo = self.divide_even_odd(self.polymul(nums[i], Q_trans))
+                    nums[i] = Uo if N % 2 else Ue
+                    Ns[i] = N // 2
+                    if Ns[i] == 0: ret[i] = nums[i][0]
+                Q = self.reduce_even(self.polymul(Q, Q_trans))
+        return ret if batch else ret[0]
 
     def solve_linear_recurrence_naive(self, A, C, N=10):
         """
@@ -106,19 +247,37 @@ class PolyLib():
         """
         (d + 1)次線形漸化式
             a_n = c_1 * a_{n-1} + c_2 * a_{n-2} + ... + c_k * a_{n-d}  (n >= d)
-        の第N項(0-indexed)をO(d^2logN)で求める。
+        の第N項(0-indexed)をO(dlogdlogN)で求める（多項式の積はNTTによる畳み込み）。
+        Nにリストを渡すと各項をリストで返す。
         参考：http://q.c.titech.ac.jp/docs/progs/polynomial_division.html
-        多項式の積の計算にFFTを使えばO(klogklogN)でいけるみたいだが、
-        FFTにまだ手を出せる実力じゃないので将来の課題とする。
 
         In:
             A = [a_0, a_1, a_2, ..., a_{d-1}]
             C = [c_1, c_2, ..., c_d]
         Out:
-            [a_0, a_1, a_2, ..., a_{d-1}, a_d, a_{d+1}, ..., a_N]
+            a_N (Nがリストなら[a_N1, a_N2, ...])
         """
         assert len(A) == len(C)
         Q = [1] + [-c for c in C]
         P = self.polymul(A, Q, len(A) - 1)
 
-        return self.get_coeff(P, Q, N)
\ No newline at end of file
+        return self.get_coeff(P, Q, N)
+
+    def find_linear_recurrence(self, A):
+        """
+        数列の先頭A = [a_0, a_1, ..., a_{2d-1}]から、solve_linear_recurrenceに渡すCを求める。
+        modが2^31未満の素数であることが前提。
+        """
+        assert self.mod is not None and self.mod < (1 << 31), "mod must be a prime less than 2^31"
+        return berlekamp_massey(np.array([a % self.mod for a in A], dtype=np.int64), self.mod).tolist()
+
+    def nth_term(self, A, N):
+        """
+        数列の先頭A = [a_0, a_1, ..., a_{2d-1}]から漸化式を推定して第N項(0-indexed)を求める。
+        Berlekamp-Massey法でO(d^2)、その後Bostan-Mori法でO(dlogdlogN)。
+        Nにリストを渡すと各項をリストで返す。
+        """
+        C = self.find_linear_recurrence(A)
+        if not C:  # 0だけからなる数列
+            return [0] * len(N) if isinstance(N, (list, tuple)) else 0
+        return self.solve_linear_recurrence(A[:len(C)], C, N)
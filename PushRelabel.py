@@ -0,0 +1,270 @@
+"""
+highest-label push-relabel法(Goldberg-Tarjan)による最大フローのライブラリ。
+Dinic.NumbaDinicと同じCSR順の弧の配列(to, cap, rev)の上で動き、辺の追加などのAPIもそのまま使える。
+    1. sから出る辺を全て飽和させ、超過流量(excess)を持つ頂点のうち高さが最大のものから
+       高さが1低い頂点へ流す(push)。流せなくなったら高さを上げる(relabel)。
+    2. ある高さの頂点がなくなったら、それより高い頂点はtに到達できないので高さをnにする(gap relabeling)。
+    3. 一定量の仕事をするたびにtからの逆向きBFSで高さを取り直す(global relabeling)。
+1.を終えた時点(preflow)でtに届いている量が最大流量で、tに到達できない頂点の集合が最小カットになる。
+流量の分解まで必要なら、残った超過流量をsへ送り返す2段階目を同じ手続きで行う。
+Dinicの段階数が多くなりやすい、密な2部グラフ風のネットワークで効果がある。
+sから出る辺の容量の合計がint64に収まること。
+使用例：
+    mf = PushRelabel(6)
+    mf.add_link(0, 1, 10)
+    print(mf.max_flow(0, 5))                  # 流量の分解まで求める
+    print(mf.max_flow(0, 5, cut_only=True))   # 最小カットの値だけ求める（1.だけ行うので速い）
+    print(mf.min_cut(0))                      # 最小カットのs側の頂点ならTrue
+参考：https://en.wikipedia.org/wiki/Push%E2%80%93relabel_maximum_flow_algorithm
+"""
+import numpy as np
+from numba import njit
+
+from Dinic import NumbaDinic
+
+
+@njit(cache=True)
+def _excess(n, fr, dst, cap0, cap, pos):
+    """今流れている流量から各頂点の超過流量を求める"""
+    ex = np.zeros(n, dtype=np.int64)
+    for k in range(fr.shape[0]):
+        f = cap0[k] - cap[pos[k]]
+        ex[fr[k]] -= f
+        ex[dst[k]] += f
+    return ex
+
+
+@njit(cache=True)
+def _reach_sink(offsets, to, cap, rev, sink, blocked, h, queue):
+    """残余グラフでsinkまでの距離をhに書き込む。blockedは通らず、到達できない頂点はnにする"""
+    n = offsets.shape[0] - 1
+    h[:] = n
+    h[sink] = 0
+    queue[0] = sink
+    head, tail = 0, 1
+    while head < tail:
+        v = queue[head]
+        head += 1
+        for e in range(offsets[v], offsets[v + 1]):
+            w = to[e]
+            if h[w] == n and w != blocked and cap[rev[e]] > 0:
+                h[w] = h[v] + 1
+                queue[tail] = w
+                tail += 1
+
+
+@njit(cache=True)
+def _hlpp(offsets, to, cap, rev, ex, sink, blocked):
+    """
+    sinkとblocked以外の頂点の超過流量を、高さの高い順にsinkへ向けて押し出す。
+    sinkへ届かない頂点（高さn）の超過流量はそのまま残す。
+    """
+    n = offsets.shape[0] - 1
+    m = to.shape[0]
+    h = np.empty(n, dtype=np.int64)
+    it = np.empty(n, dtype=np.int64)
+    queue = np.empty(n, dtype=np.int64)
+    # 高さごとの活性な頂点のスタック（連結リスト）
+    ahead = np.empty(n, dtype=np.int64)
+    anext = np.empty(n, dtype=np.int64)
+    # 高さごとの全ての頂点の双方向連結リスト（gapの検出用）
+    dhead = np.empty(n, dtype=np.int64)
+    dnext = np.empty(n, dtype=np.int64)
+    dprev = np.empty(n, dtype=np.int64)
+    relabel_limit = 6 * n + m
+    work = relabel_limit  # 最初にglobal relabelingを行う
+    hi = -1  # 活性な頂点の高さの最大値
+    dmax = -1  # 頂点がある高さの最大値
+
+    while True:
+        if work >= relabel_limit:
+            work = 0
+            _reach_sink(offsets, to, cap, rev, sink, blocked, h, queue)
+            h[blocked] = n
+            ahead[:] = -1
+            dhead[:] = -1
+            hi = dmax = -1
+            for v in range(n):
+                it[v] = offsets[v]
+                k = h[v]
+                if k >= n:
+                    continue
+                dprev[v] = -1
+                dnext[v] = dhead[k]
+                if dhead[k] >= 0:
+                    dprev[dhead[k]] = v
+                dhead[k] = v
+                dmax = max(dmax, k)
+                if ex[v] > 0 and v != sink:
+                    anext[v] = ahead[k]
+                    ahead[k] = v
+                    hi = max(hi, k)
+
+        while hi >= 0 and ahead[hi] < 0:
+            hi -= 1
+        if hi < 0:
+            break
+        v = ahead[hi]
+        ahead[hi] = anext[v]
+        if h[v] != hi:  # gapで高さnになった頂点
+            continue
+
+        # 頂点vの超過流量がなくなるか、sinkへ届かないとわかるまで流す
+        while ex[v] > 0:
+            end = offsets[v + 1]
+            e = it[v]
+            while e < end:
+                w = to[e]
+                if cap[e] > 0 and h[v] == h[w] + 1:
+                    d = min(ex[v], cap[e])
+                    if ex[w] == 0 and w != sink:
+                        anext[w] = ahead[h[w]]
+                        ahead[h[w]] = w
+                    cap[e] -= d
+                    cap[rev[e]] += d
+                    ex[v] -= d
+                    ex[w] += d
+                    if ex[v] == 0:
+                        break
+                e += 1
+            it[v] = e
+            if ex[v] == 0:
+                break
+
+            # relabel: 高さhのリストから外し、空になったらgap relabeling
+            k = h[v]
+            if dprev[v] >= 0:
+                dnext[dprev[v]] = dnext[v]
+            else:
+                dhead[k] = dnext[v]
+            if dnext[v] >= 0:
+                dprev[dnext[v]] = dprev[v]
+            if dhead[k] < 0:
+                for j in range(k + 1, dmax + 1):
+                    u = dhead[j]
+                    while u >= 0:
+                        h[u] = n
+                        u = dnext[u]
+                    dhead[j] = -1
+                dmax = k - 1
+                h[v] = n
+                break
+            nh = n
+            for e in range(offsets[v], end):
+                if cap[e] > 0:
+                    nh = min(nh, h[to[e]] + 1)
+            work += end - offsets[v] + 12
+            it[v] = offsets[v]
+            h[v] = nh
+            if nh >= n:
+                break
+            dprev[v] = -1
+            dnext[v] = dhead[nh]
+            if dhead[nh] >= 0:
+                dprev[dhead[nh]] = v
+            dhead[nh] = v
+            dmax = max(dmax, nh)
+            hi = max(hi, nh)
+            if work >= relabel_limit:
+                # 高さを取り直すので、残りは次のglobal relabeling後に改めて活性な頂点として拾う
+                break
+
+
+@njit(cache=True)
+def _push_relabel(offsets, to, cap, rev, ex, s, t, cut_only):
+    # sから出る辺を全て飽和させる
+    for e in range(offsets[s], offsets[s + 1]):
+        d = cap[e]
+        if d > 0 and to[e] != s:
+            cap[e] = 0
+            cap[rev[e]] += d
+            ex[s] -= d
+            ex[to[e]] += d
+    _hlpp(offsets, to, cap, rev, ex, t, s)
+    if not cut_only:
+        _hlpp(offsets, to, cap, rev, ex, s, t)
+    return ex[t]
+
+
+@njit(cache=True)
+def _cut_side(offsets, to, cap, rev, t):
+    """残余グラフでtに到達できない頂点をTrueとする"""
+    n = offsets.shape[0] - 1
+    h = np.empty(n, dtype=np.int64)
+    queue = np.empty(n, dtype=np.int64)
+    _reach_sink(offsets, to, cap, rev, t, -1, h, queue)
+    return h == n
+
+
+class PushRelabel(NumbaDinic):
+    """
+    NumbaDinicの辺の持ち方をそのまま使い、max_flowだけをpush-relabel法に差し替えたもの。
+    max_flowの返り値はNumbaDinicと同じくその呼び出しで増えた流量。
+    cut_only=Trueで呼んだ後は辺の流量がpreflow（保存則を満たさない）なので、
+    edge_flowを使うなら改めてcut_only=Falseで呼ぶこと（超過流量の送り返しだけが行われる）。
+    """
+    def __init__(self, n):
+        super().__init__(n)
+        self._preflow_sink = -1
+
+    def max_flow(self, s, t, cut_only=False):
+        """sからtへ流せるだけ流し、増えた流量を返す。cut_only=Trueなら最小カットの値を求めるところまでで止める"""
+        self._build()
+        if self.offsets is None or s == t:
+            return 0
+        ex = _excess(self.n, self.fr, self.dst, self.cap0, self.cap, self.pos)
+        before = int(ex[t])
+        after = int(_push_relabel(self.offsets, self.to, self.cap, self.rev, ex, s, t, cut_only))
+        self._preflow_sink = t if cut_only else -1
+        return after - before
+
+    def min_cut(self, s):
+        """
+        最小カットのs側の頂点をTrueとしたnp.bool_の配列を返す。
+        cut_only=Trueで解いた直後なら、sからの到達可能性ではなくtに到達できるかで判定する。
+        """
+        if self._preflow_sink < 0:
+            return super().min_cut(s)
+        self._build()
+        return _cut_side(self.offsets, self.to, self.cap, self.rev, self._preflow_sink)
+
+    def reset_flow(self):
+        super().reset_flow()
+        self._preflow_sink = -1
+
+    def edge_flow(self, k=None):
+        assert self._preflow_sink < 0, "the current flow is a preflow; call max_flow(s, t) first"
+        return super().edge_flow(k)
+
+
+if __name__ == '__main__':
+    """密な2部グラフ風のネットワークでDinic, NumbaDinicと速度を比べる"""
+    import time
+
+    from Dinic import Dinic
+
+    rng = np.random.default_rng(0)
+    for cls in (PushRelabel, NumbaDinic):  # コンパイル済みのコードを読み込んでおく
+        mf = cls(3)
+        mf.add_links([0, 1], [1, 2], [1, 1])
+        mf.max_flow(0, 2)
+    for L, deg in ((300, 100), (3000, 300), (20000, 50)):
+        n = 2 * L + 2
+        s, t = 2 * L, 2 * L + 1
+        us = np.concatenate((np.full(L, s), np.repeat(np.arange(L), deg), np.arange(L, 2 * L)))
+        vs = np.concatenate((np.arange(L), rng.integers(L, 2 * L, L * deg), np.full(L, t)))
+        caps = np.concatenate((rng.integers(1, 1000, L), rng.integers(1, 100, L * deg), rng.integers(1, 1000, L)))
+        print(f"L={L}, m={us.shape[0]}")
+        solvers = [("PushRelabel", PushRelabel), ("PushRelabel(cut)", PushRelabel), ("NumbaDinic", NumbaDinic)]
+        if us.shape[0] <= 10 ** 5:
+            solvers.append(("Dinic", Dinic))
+        for name, cls in solvers:
+            mf = cls(n)
+            if isinstance(mf, NumbaDinic):
+                mf.add_links(us, vs, caps)
+            else:
+                for u, v, c in zip(us.tolist(), vs.tolist(), caps.tolist()):
+                    mf.add_link(u, v, c)
+            start = time.perf_counter()
+            flow = mf.max_flow(s, t, True) if name == "PushRelabel(cut)" else mf.max_flow(s, t)
+            print(f"    {name:>16}: flow={flow}, {time.perf_counter() - start:.3f}s")
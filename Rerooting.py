@@ -0,0 +1,99 @@
+"""
+全方位木DP(rerooting)のライブラリ。
+頂点vを根とする部分木のDP値を
+    dp[v] = finalize(op(lift(dp[c1], c1, v), lift(dp[c2], c2, v), ...), v)   (c1, c2, ...はvの子)
+で定めるとき、全ての頂点を根とした場合のdp[root]をまとめてO(n)で求める。
+    op(a, b)              : 可換モノイドの演算（単位元e）
+    lift(x, child, parent): 子の部分木のDP値を親から見た値に変換する（辺の寄与を足すなど）
+    finalize(x, v)        : 子たちの値をまとめたものに頂点vの寄与を加える（不要なら省略可）
+はいずれもint64を受け取りint64を返すnjit関数であること。
+LCA.rerootを根ごとに呼ぶとO(n^2logn)かかるところを、
+「親側の部分木のDP値」を前計算した左右からの累積で求めることでO(n)にしている。
+非再帰かつ配列ベースなので10^6頂点でも動く。
+使用例（各頂点から最も遠い頂点までの距離）：
+    @njit
+    def lift(x, c, p): return x + 1
+    ans = rerooting(repn, op_max, 0, lift)
+参考：https://qiita.com/Kiri8128/items/a011c90d25911bdb3ed3
+"""
+import numpy as np
+from numba import njit
+
+from Graph import as_csr
+from LeastCommonAncestor import op_max, op_min, op_add
+
+
+@njit
+def finalize_identity(x, v): return x
+
+
+@njit
+def _rerooting(offsets, targets, op, e, lift, finalize):
+    n = offsets.shape[0] - 1
+    m = targets.shape[0]
+    parent = np.full(n, -1, dtype=np.int64)
+    order = np.empty(n, dtype=np.int64)
+    visited = np.zeros(n, dtype=np.bool_)
+    stack = np.empty(n, dtype=np.int64)
+    stack[0] = 0
+    top = 1
+    visited[0] = True
+    t = 0
+    while top > 0:
+        top -= 1
+        v = stack[top]
+        order[t] = v
+        t += 1
+        for i in range(offsets[v], offsets[v + 1]):
+            nv = targets[i]
+            if not visited[nv]:
+                visited[nv] = True
+                parent[nv] = v
+                stack[top] = nv
+                top += 1
+
+    # 1. 根を0としたときの部分木のDP値を葉から求める
+    down = np.empty(n, dtype=np.int64)
+    for j in range(n - 1, -1, -1):
+        v = order[j]
+        acc = e
+        for i in range(offsets[v], offsets[v + 1]):
+            c = targets[i]
+            if c != parent[v]:
+                acc = op(acc, lift(down[c], c, v))
+        down[v] = finalize(acc, v)
+
+    # 2. 根から順に、各辺の値の左右からの累積を使って子から見た親側の部分木のDP値upを求める
+    up = np.empty(n, dtype=np.int64)
+    ans = np.empty(n, dtype=np.int64)
+    val = np.empty(m, dtype=np.int64)
+    suffix = np.empty(m + 1, dtype=np.int64)
+    for j in range(n):
+        v = order[j]
+        lo, hi = offsets[v], offsets[v + 1]
+        for i in range(lo, hi):
+            c = targets[i]
+            if c == parent[v]:
+                val[i] = lift(up[v], c, v)
+            else:
+                val[i] = lift(down[c], c, v)
+        suffix[hi] = e
+        for i in range(hi - 1, lo - 1, -1):
+            suffix[i] = op(val[i], suffix[i + 1])
+        prefix = e
+        for i in range(lo, hi):
+            c = targets[i]
+            if c != parent[v]:
+                up[c] = finalize(op(prefix, suffix[i + 1]), v)
+            prefix = op(prefix, val[i])
+        ans[v] = finalize(prefix, v)
+    return ans
+
+
+def rerooting(repn, op, e, lift, finalize=finalize_identity):
+    """
+    頂点番号が0, 1, ..., n-1で与えられた木のrepn(隣接リストまたはGraph.CSRGraph)について、
+    ans[v] = (頂点vを根としたときの根のDP値) を並べたnp.int64の配列を返す。
+    """
+    offsets, targets, _ = as_csr(repn)
+    return _rerooting(offsets, targets, op, e, lift, finalize)
@@ -1,11 +1,144 @@
-def stronglyConnectedComponents(N, edges_from, edges_to):
+import numpy as np
+from numba import njit
+
+from Graph import CSRGraph
+
+
+@njit(cache=True)
+def scc_csr(offsets, targets):
+    """
+    CSR形式のグラフの強連結成分分解をTarjanのアルゴリズムで行う（非再帰）。
+    返り値は(成分数, ids)で、ids[v]は頂点vが属する成分の番号。
+    成分の番号はトポロジカル順（u -> vの辺があればids[u] <= ids[v]）。
+    参考：https://github.com/atcoder/ac-library/blob/master/atcoder/internal_scc.hpp
+    """
+    n = offsets.shape[0] - 1
+    # 辺をたどるたびにランダムアクセスするorderはint32にしてキャッシュに載りやすくする
+    order = np.full(n, -1, dtype=np.int32)  # 最初に訪れた時刻、成分が確定したらnにする
+    low = np.zeros(n, dtype=np.int32)
+    ids = np.zeros(n, dtype=np.int32)
+    it = offsets[:-1].copy()  # 各頂点で次に見る辺
+    visited = np.empty(n, dtype=np.int32)  # 成分が未確定の頂点のスタック
+    callstack = np.empty(n, dtype=np.int32)
+    vtop = 0
+    now = 0
+    group = 0
+    for s in range(n):
+        if order[s] != -1:
+            continue
+        callstack[0] = s
+        ctop = 1
+        order[s] = low[s] = now
+        now += 1
+        visited[vtop] = s
+        vtop += 1
+        while ctop > 0:
+            v = callstack[ctop - 1]
+            # 未訪問の頂点が見つかるまでvの辺をまとめて見る
+            i, end, lv = it[v], offsets[v + 1], low[v]
+            pushed = False
+            while i < end:
+                to = targets[i]
+                i += 1
+                if order[to] == -1:
+                    order[to] = low[to] = now
+                    now += 1
+                    visited[vtop] = to
+                    vtop += 1
+                    callstack[ctop] = to
+                    ctop += 1
+                    pushed = True
+                    break
+                if order[to] < lv:
+                    lv = order[to]
+            it[v] = i
+            low[v] = lv
+            if pushed:
+                continue
+            ctop -= 1
+            if low[v] == order[v]:
+                while True:
+                    vtop -= 1
+                    u = visited[vtop]
+                    order[u] = n
+                    ids[u] = group
+                    if u == v:
+                        break
+                group += 1
+            if ctop > 0:
+                p = callstack[ctop - 1]
+                if low[v] < low[p]:
+                    low[p] = low[v]
+    # Tarjanでは成分が逆トポロジカル順に確定するので番号を反転する
+    for v in range(n):
+        ids[v] = group - 1 - ids[v]
+    return group, ids
+
+
+@njit(cache=True)
+def condensation_csr(offsets, targets, num, ids):
+    """強連結成分を1頂点に潰したDAGを、多重辺を除いたCSR形式(c_offsets, c_targets)で返す"""
+    n = offsets.shape[0] - 1
+    c_offsets = np.zeros(num + 1, dtype=np.int64)
+    for v in range(n):
+        for i in range(offsets[v], offsets[v + 1]):
+            if ids[v] != ids[targets[i]]:
+                c_offsets[ids[v] + 1] += 1
+    for c in range(num):
+        c_offsets[c + 1] += c_offsets[c]
+    fill = c_offsets[:-1].copy()
+    raw = np.empty(c_offsets[num], dtype=np.int64)
+    for v in range(n):
+        for i in range(offsets[v], offsets[v + 1]):
+            a, b = ids[v], ids[targets[i]]
+            if a != b:
+                raw[fill[a]] = b
+                fill[a] += 1
+    # 成分ごとに、行き先の重複をスタンプで除きながら詰め直す
+    stamp = np.full(num, -1, dtype=np.int64)
+    c_targets = np.empty(c_offsets[num], dtype=np.int64)
+    k = 0
+    for c in range(num):
+        lo, hi = c_offsets[c], c_offsets[c + 1]
+        c_offsets[c] = k
+        for i in range(lo, hi):
+            b = raw[i]
+            if stamp[b] != c:
+                stamp[b] = c
+                c_targets[k] = b
+                k += 1
+    c_offsets[num] = k
+    return c_offsets, c_targets[:k].copy()
+
+
+def condensation(N, edges_from=None, edges_to=None):
+    """
+    強連結成分分解をコンパイル済みのコードで行い、(成分数, ids, 縮約したDAGのCSRGraph)を返す。
+    ids[v]はトポロジカル順の成分番号。引数はstronglyConnectedComponentsと同じ。
+    """
+    if not isinstance(N, CSRGraph):
+        N = CSRGraph.from_edges(N, edges_from, edges_to)
+    num, ids = scc_csr(N.offsets, N.targets)
+    c_offsets, c_targets = condensation_csr(N.offsets, N.targets, num, ids)
+    return num, ids, CSRGraph(c_offsets, c_targets)
+
+
+def stronglyConnectedComponents(N, edges_from=None, edges_to=None):
     """
     グラフの強連結成分分解を行う。
     さらにこの時返されるgroupはトポロジカル順になる。
     頂点番号は0スタートであること。
+    Nの代わりにGraph.CSRGraphを渡すと、コンパイル済みのscc_csrで処理する。
 
     !!! まだ実装の中身が理解できてない !!!
     """
+    if isinstance(N, CSRGraph):
+        num, ids = scc_csr(N.offsets, N.targets)
+        order = np.argsort(ids, kind='stable')
+        bounds = np.searchsorted(ids[order], np.arange(num + 1)).tolist()
+        order = order.tolist()
+        return [order[bounds[c]:bounds[c + 1]] for c in range(num)]
+
     M = len(edges_from)
     start = [0] * (N+1)
     elist = [0] * M
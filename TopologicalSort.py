@@ -1,6 +1,230 @@
+import heapq
 from collections import deque
 
-def topologicalSort(repn):
+import numpy as np
+from numba import njit
+
+from Graph import CSRGraph, as_csr
+
+
+@njit(cache=True)
+def _topological_sort_csr(offsets, targets):
+    n = offsets.shape[0] - 1
+    indegrees = np.zeros(n, dtype=np.int64)
+    for i in range(targets.shape[0]):
+        indegrees[targets[i]] += 1
+    sorted_vertices = np.empty(n, dtype=np.int64)
+    head, tail = 0, 0
+    for i in range(n):
+        if indegrees[i] == 0:
+            sorted_vertices[tail] = i
+            tail += 1
+    while head < tail:
+        i = sorted_vertices[head]
+        head += 1
+        for k in range(offsets[i], offsets[i + 1]):
+            j = targets[k]
+            indegrees[j] -= 1
+            if indegrees[j] == 0:
+                sorted_vertices[tail] = j
+                tail += 1
+    return sorted_vertices[:tail].copy()
+
+
+@njit(cache=True)
+def _topological_levels_csr(offsets, targets):
+    """
+    入次数0の頂点を段ごとにまとめて取り出すKahnのアルゴリズム。
+    同じ段の頂点同士には依存関係がない（反鎖になる）ので並列に処理できる。
+    段kの頂点はvertices[level_offsets[k]:level_offsets[k + 1]]。
+    """
+    n = offsets.shape[0] - 1
+    indegrees = np.zeros(n, dtype=np.int64)
+    for i in range(targets.shape[0]):
+        indegrees[targets[i]] += 1
+    vertices = np.empty(n, dtype=np.int64)
+    level_offsets = np.zeros(n + 1, dtype=np.int64)
+    tail = 0
+    for i in range(n):
+        if indegrees[i] == 0:
+            vertices[tail] = i
+            tail += 1
+    head = 0
+    k = 0
+    while head < tail:
+        k += 1
+        level_offsets[k] = tail
+        end = tail
+        for p in range(head, end):
+            i = vertices[p]
+            for e in range(offsets[i], offsets[i + 1]):
+                j = targets[e]
+                indegrees[j] -= 1
+                if indegrees[j] == 0:
+                    vertices[tail] = j
+                    tail += 1
+        head = end
+    return level_offsets[:k + 1].copy(), vertices[:tail].copy()
+
+
+@njit(cache=True)
+def _topological_sort_lex_csr(offsets, targets):
+    """入次数0の頂点のうち番号最小のものをヒープで取り出して、辞書順最小のトポロジカル順を求める"""
+    n = offsets.shape[0] - 1
+    indegrees = np.zeros(n, dtype=np.int64)
+    for i in range(targets.shape[0]):
+        indegrees[targets[i]] += 1
+    heap = [i for i in range(n) if indegrees[i] == 0]
+    heapq.heapify(heap)
+    sorted_vertices = np.empty(n, dtype=np.int64)
+    tail = 0
+    while heap:
+        i = heapq.heappop(heap)
+        sorted_vertices[tail] = i
+        tail += 1
+        for e in range(offsets[i], offsets[i + 1]):
+            j = targets[e]
+            indegrees[j] -= 1
+            if indegrees[j] == 0:
+                heapq.heappush(heap, j)
+    return sorted_vertices[:tail].copy()
+
+
+@njit(cache=True)
+def _find_cycle_csr(offsets, targets):
+    """
+    白黒灰の3色の非再帰DFSで後退辺を見つけ、閉路 v0 -> v1 -> ... -> v(k-1) -> v0 の頂点列を返す。
+    閉路がなければ長さ0の配列を返す。
+    """
+    n = offsets.shape[0] - 1
+    color = np.zeros(n, dtype=np.int8)  # 0: 未訪問, 1: 探索中, 2: 探索済み
+    parent = np.full(n, -1, dtype=np.int64)
+    it = offsets[:-1].copy()
+    stack = np.empty(n, dtype=np.int64)
+    for s in range(n):
+        if color[s] != 0:
+            continue
+        stack[0] = s
+        top = 1
+        color[s] = 1
+        while top > 0:
+            v = stack[top - 1]
+            if it[v] == offsets[v + 1]:
+                color[v] = 2
+                top -= 1
+                continue
+            to = targets[it[v]]
+            it[v] += 1
+            if color[to] == 0:
+                color[to] = 1
+                parent[to] = v
+                stack[top] = to
+                top += 1
+            elif color[to] == 1:
+                # to -> ... -> v -> to が閉路
+                k = 1
+                u = v
+                while u != to:
+                    u = parent[u]
+                    k += 1
+                cycle = np.empty(k, dtype=np.int64)
+                u = v
+                for i in range(k - 1, -1, -1):
+                    cycle[i] = u
+                    u = parent[u]
+                return cycle
+    return np.zeros(0, dtype=np.int64)
+
+
+@njit(cache=True)
+def _longest_path_csr(offsets, targets, weights, order):
+    """
+    トポロジカル順orderに沿って、各頂点で終わる最長路の長さdistと、その直前の頂点prevを求める。
+    weightsが空なら各辺の長さを1とする。
+    """
+    n = offsets.shape[0] - 1
+    dist = np.zeros(n, dtype=np.int64)
+    prev = np.full(n, -1, dtype=np.int64)
+    weighted = weights.shape[0] > 0
+    for i in order:
+        for e in range(offsets[i], offsets[i + 1]):
+            j = targets[e]
+            d = dist[i] + (weights[e] if weighted else 1)
+            if prev[j] < 0 or d > dist[j]:
+                dist[j] = d
+                prev[j] = i
+    return dist, prev
+
+
+def topologicalSortCSR(graph, mode="bfs"):
+    """
+    Graph.CSRGraph(または隣接リスト)のトポロジカルソートをコンパイル済みのコードで行う。
+    modeは
+        "bfs"    : Kahnのアルゴリズムによる順番（np.int64の配列）
+        "lex"    : 辞書順最小の順番（np.int64の配列）
+        "levels" : 並列に実行できる段ごとに分けたもの (level_offsets, vertices)
+    返り値は(結果, 閉路)の組で、DAGなら閉路はNone。
+    閉路があれば結果はNoneで、閉路 v0 -> v1 -> ... -> v0 の頂点列を代わりに返す。
+    """
+    offsets, targets, _ = as_csr(graph)
+    n = offsets.shape[0] - 1
+    if mode == "bfs":
+        result = _topological_sort_csr(offsets, targets)
+        done = result.shape[0]
+    elif mode == "lex":
+        result = _topological_sort_lex_csr(offsets, targets)
+        done = result.shape[0]
+    elif mode == "levels":
+        result = _topological_levels_csr(offsets, targets)
+        done = result[1].shape[0]
+    else:
+        raise ValueError("mode must be 'bfs', 'lex' or 'levels', but given {}".format(mode))
+    if done < n:
+        return None, _find_cycle_csr(offsets, targets)
+    return result, None
+
+
+def longestPath(graph):
+    """
+    DAGの各頂点で終わる最長路（クリティカルパス）の長さを求める。
+    辺の重みがあればそれを所要時間とし、なければ各辺を長さ1とする。
+    返り値は((dist, prev), 閉路)の組で、prevをたどると最長路を復元できる（criticalPathを参照）。
+    閉路があれば(None, 閉路の頂点列)を返す。
+    """
+    offsets, targets, weights = as_csr(graph)
+    order, cycle = topologicalSortCSR(CSRGraph(offsets, targets))
+    if cycle is not None:
+        return None, cycle
+    if weights is None:
+        weights = np.zeros(0, dtype=np.int64)
+    return _longest_path_csr(offsets, targets, weights, order), None
+
+
+def criticalPath(dist, prev):
+    """longestPathの結果から、全体で最も長い路の頂点列を返す"""
+    v = int(np.argmax(dist))
+    path = [v]
+    while prev[v] >= 0:
+        v = int(prev[v])
+        path.append(v)
+    return path[::-1]
+
+
+def topologicalSort(repn, return_cycle=False):
+    """
+    Kahnのアルゴリズムでトポロジカル順を返す。閉路があれば[]を返す。
+    return_cycle=Trueなら(トポロジカル順, 閉路)の組を返し、DAGなら閉路はNone、
+    閉路があれば閉路 v0 -> v1 -> ... -> v0 の頂点列を返す（トポロジカル順は[]）。
+    repnにGraph.CSRGraphを渡すとコンパイル済みのコードで処理し、np.int64の配列を返す。
+    """
+    if isinstance(repn, CSRGraph):
+        order = _topological_sort_csr(repn.offsets, repn.targets)
+        if order.shape[0] == repn.n:
+            return (order, None) if return_cycle else order
+        if return_cycle:
+            return order[:0], _find_cycle_csr(repn.offsets, repn.targets)
+        return order[:0]
+
     # total vertex num
     n = len(repn)
 
@@ -23,7 +247,10 @@ def topologicalSort(repn):
     
     # success check
     if len(sorted_vertices) == n:
-        return sorted_vertices
+        return (sorted_vertices, None) if return_cycle else sorted_vertices
+    elif return_cycle:
+        offsets, targets, _ = as_csr(repn)
+        return [], _find_cycle_csr(offsets, targets).tolist()
     else:
         return []
 
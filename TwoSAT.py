@@ -0,0 +1,55 @@
+"""
+2-SATのライブラリ。
+n個の真偽値変数x_0, ..., x_{n-1}について、(x_i == f) or (x_j == g) という形の節を全て満たす割り当てを求める。
+リテラル(x_i == True)を頂点2i+1, (x_i == False)を頂点2iとした2n頂点の含意グラフを
+np.int64の配列から直接CSR形式で作り、StronglyConnectedComponents.scc_csrで強連結成分分解する。
+x_iとnot x_iが同じ成分にあれば充足不能で、そうでなければトポロジカル順で後ろにある方を真にすればよい。
+参考：https://github.com/atcoder/ac-library/blob/master/atcoder/twosat.hpp
+使用例：
+    ts = TwoSAT(3)
+    ts.add_clause(0, True, 1, False)              # x0 or (not x1)
+    ts.add_clauses(xs, fs, ys, gs)                # まとめて追加（いずれも配列）
+    print(ts.satisfiable())                       # np.bool_の配列かNone
+"""
+import numpy as np
+
+from Graph import CSRGraph
+from StronglyConnectedComponents import scc_csr
+
+
+class TwoSAT():
+    def __init__(self, n):
+        self.n = n
+        self._clauses = []  # (xs, fs, ys, gs)の配列の組を貯めておき、解くときにまとめて結合する
+
+    def add_clause(self, i, f, j, g):
+        """節 (x_i == f) or (x_j == g) を追加する"""
+        self.add_clauses([i], [f], [j], [g])
+
+    def add_clauses(self, xs, fs, ys, gs):
+        """節 (x_{xs[k]} == fs[k]) or (x_{ys[k]} == gs[k]) をまとめて追加する"""
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        fs = np.asarray(fs, dtype=np.int64)
+        gs = np.asarray(gs, dtype=np.int64)
+        assert xs.shape == fs.shape == ys.shape == gs.shape
+        self._clauses.append((xs, fs, ys, gs))
+
+    def implication_graph(self):
+        """含意グラフ (not a) -> b, (not b) -> a をCSRGraphとして返す"""
+        if self._clauses:
+            xs, fs, ys, gs = (np.concatenate(arrs) for arrs in zip(*self._clauses))
+        else:
+            xs = fs = ys = gs = np.zeros(0, dtype=np.int64)
+        us = np.concatenate((2 * xs + 1 - fs, 2 * ys + 1 - gs))
+        vs = np.concatenate((2 * ys + gs, 2 * xs + fs))
+        return CSRGraph.from_edges(2 * self.n, us, vs)
+
+    def satisfiable(self):
+        """全ての節を満たす割り当てをnp.bool_の配列で返す。充足不能ならNoneを返す"""
+        g = self.implication_graph()
+        _, ids = scc_csr(g.offsets, g.targets)
+        neg, pos = ids[0::2], ids[1::2]
+        if np.any(neg == pos):
+            return None
+        return neg < pos
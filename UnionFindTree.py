@@ -1,5 +1,81 @@
 import numpy as np
-from numba import jitclass, i8
+from numba import i8, njit
+try:
+    from numba.experimental import jitclass
+except ImportError:  # numba < 0.49
+    from numba import jitclass
+
+
+@njit(cache=True)
+def group_labels(parents):
+    """
+    根ノードのparentが負であるような親の配列から、連結成分に最小の要素が小さい順に0, 1, ...と番号を振り、
+    各要素の属する連結成分の番号の配列を返す（O(n)、parentsは書き換えない）
+    """
+    n = parents.shape[0]
+    root = np.full(n, -1, dtype=np.int64)
+    root_label = np.full(n, -1, dtype=np.int64)
+    ret = np.empty(n, dtype=np.int64)
+    k = 0
+    for i in range(n):
+        # 根か、根が分かっているノードまで上り、通ったノードに根を書き込む
+        x = i
+        while parents[x] >= 0 and root[x] < 0:
+            x = parents[x]
+        r = x if parents[x] < 0 else root[x]
+        x = i
+        while parents[x] >= 0 and root[x] < 0:
+            root[x] = r
+            x = parents[x]
+        if root_label[r] < 0:
+            root_label[r] = k
+            k += 1
+        ret[i] = root_label[r]
+    return ret
+
+
+@njit(cache=True)
+def group_members(labels):
+    """
+    group_labelsの番号labelsから連結成分ごとの要素をCSR形式で返す
+    番号がjの連結成分の要素はmembers[offsets[j]:offsets[j + 1]]（昇順）
+    """
+    n = labels.shape[0]
+    k = labels.max() + 1 if n > 0 else 0
+    offsets = np.zeros(k + 1, dtype=np.int64)
+    for i in range(n):
+        offsets[labels[i] + 1] += 1
+    for j in range(k):
+        offsets[j + 1] += offsets[j]
+    fill = offsets[:-1].copy()
+    members = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        members[fill[labels[i]]] = i
+        fill[labels[i]] += 1
+    return offsets, members
+
+
+@njit
+def union_many(uf, xs, ys):
+    """
+    i = 0, 1, ...の順にuf.union(xs[i], ys[i])を呼び、それぞれで新たに繋いだかどうかをnp.bool_の配列で返す
+    """
+    ret = np.empty(xs.shape[0], dtype=np.bool_)
+    for i in range(xs.shape[0]):
+        ret[i] = uf.union(xs[i], ys[i])
+    return ret
+
+
+@njit
+def same_many(uf, xs, ys):
+    """
+    xs[i]とys[i]がufでpath-connectedかをnp.bool_の配列で返す
+    """
+    ret = np.empty(xs.shape[0], dtype=np.bool_)
+    for i in range(xs.shape[0]):
+        ret[i] = uf.find(xs[i]) == uf.find(ys[i])
+    return ret
+
 
 spec = [
     ('n', i8),
@@ -26,38 +102,36 @@ class UnionFind:
     def find(self, x):
         """
         xの属する木の根を返す
-        このとき同時に経路圧縮して、探索途中のノードを全て根に繋ぎ直す
+        このとき同時に経路を半分に縮める（path halving）。各ノードを祖父に繋ぎ直しながら上るので、
+        スタックを確保せずに経路圧縮とほぼ同じ効果が得られる
         """
-        if self.parents[x] < 0:
-            return x
-        #else:
-        #    self.parents[x] = self.find(self.parents[x])
-        #    return self.parents[x]
-
-        stack = [x]
-        while self.parents[x] >= 0:
-            x = self.parents[x]
-            stack.append(x)
-        for y in stack[:-1]:
-            self.parents[y] = x
+        parents = self.parents
+        while parents[x] >= 0:
+            p = parents[x]
+            if parents[p] < 0:
+                return p
+            parents[x] = parents[p]
+            x = parents[p]
         return x
 
     def union(self, x, y):
         """
         x, yのそれぞれ属する木Tx, Tyの根同士を繋ぐ
         このとき木の要素数が小さい方を大きい方に繋ぐ（rankではなくsizeを用いる）
+        新たに繋いだならTrue、もともと同じ木ならFalseを返す
         """
         x = self.find(x)
         y = self.find(y)
 
         if x == y:
-            return
+            return False
 
         if self.parents[x] > self.parents[y]:
             x, y = y, x
 
         self.parents[x] += self.parents[y]
         self.parents[y] = x
+        return True
 
     def size(self, x):
         """
@@ -72,37 +146,359 @@ class UnionFind:
         """
         return self.find(x) == self.find(y)
 
-    ###### これ以降の操作は線形時間かかるので使用は非推奨 ######
+    def union_many(self, xs, ys):
+        """
+        i = 0, 1, ...の順にxs[i]とys[i]を繋ぎ、それぞれで新たに繋いだかどうかをnp.bool_の配列で返す
+        """
+        return union_many(self, xs, ys)
+
+    def same_many(self, xs, ys):
+        """
+        xs[i]とys[i]がpath-connectedかをnp.bool_の配列で返す
+        """
+        return same_many(self, xs, ys)
+
+    ###### これ以降の操作はO(n)かかる ######
+
+    def labels(self):
+        """
+        連結成分に最小の要素が小さい順に0, 1, ...と番号を振り、各要素の属する連結成分の番号の配列を返す
+        """
+        return group_labels(self.parents)
+
+    def groups(self):
+        """
+        連結成分ごとの要素をCSR形式で返す
+        labels()の番号がjの連結成分の要素はmembers[offsets[j]:offsets[j + 1]]（昇順）
+        """
+        return group_members(self.labels())
 
-    '''
     def members(self, x):
         """
         xの属する木の要素を列挙する
         """
         root = self.find(x)
-        return [i for i in range(self.n) if self.find(i) == root]
+        ret = np.empty(self.size(root), dtype=np.int64)
+        k = 0
+        for i in range(self.n):
+            if self.find(i) == root:
+                ret[k] = i
+                k += 1
+        return ret
 
     def roots(self):
         """
-        連結成分の代表元のリストを返す
+        連結成分の代表元の配列を返す
         """
-        return [i for i, x in enumerate(self.parents) if x < 0]
+        return np.flatnonzero(self.parents < 0)
 
     def group_count(self):
         """
         連結成分の個数を返す
         """
-        return len(self.roots())
+        return np.count_nonzero(self.parents < 0)
 
     def all_group_members(self):
-         """
-         連結成分およびそれぞれの代表元をまとめた辞書を返す
-         代表元がキーになってる
-         """
-         return {r: self.members(r) for r in self.roots()}
-    '''
+        """
+        連結成分およびそれぞれの代表元をまとめた辞書(numba.typed.Dict)を返す
+        代表元がキーになってる
+        """
+        offsets, members = self.groups()
+        ret = dict()
+        for j in range(offsets.shape[0] - 1):
+            ret[self.find(members[offsets[j]])] = members[offsets[j]:offsets[j + 1]].copy()
+        return ret
+
     def __str__(self):
         """
         連結成分およびその代表元を出力
         """
-        return '\n'.join('{}: {}'.format(r, self.members(r)) for r in self.roots())
+        offsets, members = self.groups()
+        lines = []
+        for j in range(offsets.shape[0] - 1):
+            items = [str(members[i]) for i in range(offsets[j], offsets[j + 1])]
+            lines.append(str(self.find(members[offsets[j]])) + ': [' + ', '.join(items) + ']')
+        return '\n'.join(lines)
+
+
+spec_rollback = [
+    ('n', i8),
+    ('parents', i8[:]),
+    ('history', i8[:]),
+    ('history_size', i8[:]),
+    ('top', i8),
+]
+
+@jitclass(spec_rollback)
+class RollbackUnionFind:
+    """
+    直前の操作から順に取り消せるUnion-Find
+    経路圧縮をすると取り消しが難しいので、union by sizeだけでfindの計算量をO(logn)に抑える
+    繋いだ操作をスタックに積んでおき、snapshot()で今の状態を覚えてrollback(state)でそこまで戻す
+        uf = RollbackUnionFind(n)
+        state = uf.snapshot()
+        uf.union(0, 1)
+        uf.rollback(state)   # 0と1は繋がっていない状態に戻る
+    """
+    def __init__(self, n):
+        """
+        parentsはUnionFindと同じく、根ノードには(その木のノード数)*(-1)を格納する
+        history[k]はk番目に繋いだときに子になった根で、history_size[k]はそのときのその根のparents
+        """
+        self.n = n
+        self.parents = np.full(n, -1, dtype=np.int64)
+        self.history = np.empty(max(n - 1, 0), dtype=np.int64)
+        self.history_size = np.empty(max(n - 1, 0), dtype=np.int64)
+        self.top = 0
+
+    def find(self, x):
+        """
+        xの属する木の根を返す（経路圧縮はしない）
+        """
+        while self.parents[x] >= 0:
+            x = self.parents[x]
+        return x
+
+    def union(self, x, y):
+        """
+        x, yのそれぞれ属する木の根同士を、要素数が小さい方を子にして繋ぐ
+        新たに繋いだならTrueを返してスタックに積む
+        """
+        x = self.find(x)
+        y = self.find(y)
+
+        if x == y:
+            return False
+
+        if self.parents[x] > self.parents[y]:
+            x, y = y, x
+
+        self.history[self.top] = y
+        self.history_size[self.top] = self.parents[y]
+        self.top += 1
+        self.parents[x] += self.parents[y]
+        self.parents[y] = x
+        return True
+
+    def undo(self):
+        """
+        最後に繋いだ操作を取り消す
+        """
+        assert self.top > 0, "nothing to undo"
+        self.top -= 1
+        y = self.history[self.top]
+        x = self.parents[y]
+        self.parents[y] = self.history_size[self.top]
+        self.parents[x] -= self.parents[y]
+
+    def snapshot(self):
+        """
+        今の状態を表す値（これまでに繋いだ回数）を返す
+        """
+        return self.top
+
+    def rollback(self, state):
+        """
+        snapshot()でstateを得た時点の状態に戻す
+        """
+        while self.top > state:
+            self.undo()
+
+    def size(self, x):
+        """
+        xの属する木の要素数を返す
+        """
+        return -self.parents[self.find(x)]
+
+    def same(self, x, y):
+        """
+        xとyがpath-connectedかを判定する
+        """
+        return self.find(x) == self.find(y)
+
+    def group_count(self):
+        """
+        連結成分の個数を返す（繋ぐたびに1つ減るのでO(1)）
+        """
+        return self.n - self.top
+
+    def union_many(self, xs, ys):
+        """
+        i = 0, 1, ...の順にxs[i]とys[i]を繋ぎ、それぞれで新たに繋いだかどうかをnp.bool_の配列で返す
+        """
+        return union_many(self, xs, ys)
+
+    def same_many(self, xs, ys):
+        """
+        xs[i]とys[i]がpath-connectedかをnp.bool_の配列で返す
+        """
+        return same_many(self, xs, ys)
+
+
+spec_persistent = [
+    ('n', i8),
+    ('now', i8),
+    ('parents', i8[:]),
+    ('link_time', i8[:]),
+    ('sizes', i8[:]),
+    ('history_start', i8[:]),
+    ('history_len', i8[:]),
+    ('history_cap', i8[:]),
+    ('history_time', i8[:]),
+    ('history_size', i8[:]),
+    ('history_top', i8),
+]
+
+@jitclass(spec_persistent)
+class PersistentUnionFind:
+    """
+    部分永続Union-Find
+    k回目(1-indexed)のunionの呼び出しを時刻kとして、「最初のt回のunionの後」の状態についての
+    same(x, y, t), size(x, t)にO(logn)で答える（繋がなかった呼び出しも1回と数える）
+    経路圧縮はせずunion by sizeで木の高さをO(logn)に抑え、各ノードが子になった時刻link_timeを覚えておく
+    時刻tの根はlink_time <= tである親を辿った先になる
+    要素数の履歴は根ごとの(時刻, 要素数)の列を1つの配列の中の可変長の区画に追記していき、二分探索する
+        uf = PersistentUnionFind(n)
+        uf.union(0, 1)           # 時刻1
+        uf.union(1, 2)           # 時刻2
+        uf.same(0, 2, 1)         # False
+        uf.connected_time(0, 2)  # 2
+    """
+    def __init__(self, n):
+        """
+        parentsは親（根なら自分自身）、link_timeは親に繋がれた時刻（根ならINF）、sizesは今の要素数
+        ノードvの要素数の履歴はhistory_time/history_sizeの[history_start[v], history_start[v] + history_len[v])
+        区画が埋まったら容量を倍にして末尾に移す（移した後の古い区画は使わない）
+        """
+        self.n = n
+        self.now = 0
+        self.parents = np.arange(n, dtype=np.int64)
+        self.link_time = np.full(n, 1 << 62, dtype=np.int64)
+        self.sizes = np.ones(n, dtype=np.int64)
+        self.history_start = np.zeros(n, dtype=np.int64)
+        self.history_len = np.zeros(n, dtype=np.int64)
+        self.history_cap = np.zeros(n, dtype=np.int64)
+        self.history_time = np.empty(max(n, 1), dtype=np.int64)
+        self.history_size = np.empty(max(n, 1), dtype=np.int64)
+        self.history_top = 0
+
+    def find(self, x, t):
+        """
+        時刻tでxの属する木の根を返す
+        """
+        while self.link_time[x] <= t:
+            x = self.parents[x]
+        return x
+
+    def union(self, x, y):
+        """
+        時刻を1進めて、x, yのそれぞれ属する木の根同士を要素数が小さい方を子にして繋ぐ
+        新たに繋いだならTrueを返す
+        """
+        self.now += 1
+        x = self.find(x, self.now)
+        y = self.find(y, self.now)
+
+        if x == y:
+            return False
+
+        if self.sizes[x] < self.sizes[y]:
+            x, y = y, x
+
+        self.parents[y] = x
+        self.link_time[y] = self.now
+        self.sizes[x] += self.sizes[y]
+        self._append_history(x, self.now, self.sizes[x])
+        return True
+
+    def _append_history(self, x, t, s):
+        """
+        根xの要素数の履歴に(t, s)を追記する（ならしO(1)）
+        """
+        k = self.history_len[x]
+        if k == self.history_cap[x]:
+            cap = max(2 * k, 2)
+            if self.history_top + cap > self.history_time.shape[0]:
+                size = max(2 * self.history_time.shape[0], self.history_top + cap)
+                times = np.empty(size, dtype=np.int64)
+                sizes = np.empty(size, dtype=np.int64)
+                times[:self.history_top] = self.history_time[:self.history_top]
+                sizes[:self.history_top] = self.history_size[:self.history_top]
+                self.history_time = times
+                self.history_size = sizes
+            lo, top = self.history_start[x], self.history_top
+            self.history_time[top:top + k] = self.history_time[lo:lo + k]
+            self.history_size[top:top + k] = self.history_size[lo:lo + k]
+            self.history_start[x] = top
+            self.history_cap[x] = cap
+            self.history_top += cap
+        p = self.history_start[x] + k
+        self.history_time[p] = t
+        self.history_size[p] = s
+        self.history_len[x] = k + 1
+
+    def union_many(self, xs, ys):
+        """
+        xs[i]とys[i]を順に繋ぎ（時刻は1ずつ進む）、それぞれで新たに繋いだかどうかをnp.bool_の配列で返す
+        """
+        return union_many(self, xs, ys)
+
+    def same(self, x, y, t):
+        """
+        時刻tでxとyがpath-connectedかを判定する
+        """
+        return self.find(x, t) == self.find(y, t)
+
+    def _size_at(self, r, t):
+        lo = self.history_start[r]
+        hi = lo + self.history_len[r]
+        k = np.searchsorted(self.history_time[lo:hi], t, side='right')
+        return 1 if k == 0 else self.history_size[lo + k - 1]
+
+    def size(self, x, t):
+        """
+        時刻tでxの属する木の要素数を返す
+        """
+        return self._size_at(self.find(x, t), t)
+
+    def connected_time(self, x, y):
+        """
+        xとyが初めてpath-connectedになった時刻を返す（今も繋がっていなければ-1、x == yなら0）
+        親に繋がれた時刻が早い方を上らせていき、出会ったときに最後に上った時刻が答え
+        """
+        t = 0
+        while x != y:
+            if self.link_time[x] > self.link_time[y]:
+                x, y = y, x
+            if self.link_time[x] > self.now:
+                return -1
+            t = self.link_time[x]
+            x = self.parents[x]
+        return t
+
+    def same_many(self, xs, ys, ts):
+        """
+        時刻ts[i]でxs[i]とys[i]がpath-connectedかをnp.bool_の配列で返す
+        """
+        ret = np.empty(xs.shape[0], dtype=np.bool_)
+        for i in range(xs.shape[0]):
+            ret[i] = self.find(xs[i], ts[i]) == self.find(ys[i], ts[i])
+        return ret
+
+    def size_many(self, xs, ts):
+        """
+        時刻ts[i]でxs[i]の属する木の要素数を並べた配列を返す
+        """
+        ret = np.empty(xs.shape[0], dtype=np.int64)
+        for i in range(xs.shape[0]):
+            ret[i] = self._size_at(self.find(xs[i], ts[i]), ts[i])
+        return ret
+
+    def connected_time_many(self, xs, ys):
+        """
+        xs[i]とys[i]が初めてpath-connectedになった時刻を並べた配列を返す
+        """
+        ret = np.empty(xs.shape[0], dtype=np.int64)
+        for i in range(xs.shape[0]):
+            ret[i] = self.connected_time(xs[i], ys[i])
+        return ret
@@ -1,3 +1,13 @@
+import numpy as np
+from numba import i8
+try:
+    from numba.experimental import jitclass
+except ImportError:  # numba < 0.49
+    from numba import jitclass
+
+from UnionFindTree import group_labels, group_members, same_many
+
+
 class WeightedUnionFind():
     """
     https://qiita.com/drken/items/cce6fc5c579051e64fab
@@ -113,3 +123,188 @@ class WeightedUnionFind():
         連結成分およびその代表元を出力
         """
         return '\n'.join('{}: {}'.format(r, self.members(r)) for r in self.roots())
+
+
+# 重みを載せる可換群の種類
+GROUP_ADD = 0  # 整数の加法
+GROUP_XOR = 1  # 排他的論理和
+GROUP_MOD = 2  # modを法とする加法
+
+spec = [
+    ('n', i8),
+    ('group', i8),
+    ('mod', i8),
+    ('parents', i8[:]),
+    ('diff_weight', i8[:]),
+]
+
+@jitclass(spec)
+class NumbaWeightedUnionFind:
+    """
+    WeightedUnionFindをnumbaのjitclassにしたもの
+    findが非再帰なので長い鎖でも再帰上限に引っかからず、10^6要素でもコンパイル済みのコードの中で完結する
+    重みは整数の加法の他に、xor(GROUP_XOR)やmod pでの加法(GROUP_MOD)など可換群なら載せられる
+        uf = NumbaWeightedUnionFind(n, GROUP_XOR, 0)
+        uf.union(x, y, w)        # diff(x, y) == wとなるように繋ぐ
+        uf.diff_many(xs, ys)
+    """
+    def __init__(self, n, group=GROUP_ADD, mod=0):
+        """
+        parents, diff_weightはWeightedUnionFindと同じ
+        group == GROUP_MODのときはmodを法とする
+        """
+        self.n = n
+        self.group = group
+        self.mod = mod
+        self.parents = np.full(n, -1, dtype=np.int64)
+        self.diff_weight = np.zeros(n, dtype=np.int64)
+
+    def op(self, a, b):
+        """
+        群の演算
+        """
+        if self.group == GROUP_XOR:
+            return a ^ b
+        if self.group == GROUP_MOD:
+            return (a + b) % self.mod
+        return a + b
+
+    def inv(self, a):
+        """
+        群の逆元
+        """
+        if self.group == GROUP_XOR:
+            return a
+        if self.group == GROUP_MOD:
+            return (-a) % self.mod
+        return -a
+
+    def find(self, x):
+        """
+        xの属する木の根を返す
+        根までの重みを求めてから、もう一度上りながら探索途中のノードを全て根に繋ぎ直す（非再帰）
+        """
+        r = x
+        acc = 0
+        while self.parents[r] >= 0:
+            acc = self.op(acc, self.diff_weight[r])
+            r = self.parents[r]
+        v = x
+        while self.parents[v] >= 0:
+            p = self.parents[v]
+            d = self.diff_weight[v]
+            self.parents[v] = r
+            self.diff_weight[v] = acc
+            acc = self.op(acc, self.inv(d))
+            v = p
+        return r
+
+    def union(self, x, y, w):
+        """
+        xからyへ重みwの辺を繋ぐ
+        既にx, yがpath-connectedな場合はFalseを返す
+        そうでなければTrueを返す
+        """
+        if self.group == GROUP_MOD:
+            w %= self.mod
+        rx = self.find(x)
+        ry = self.find(y)
+        if rx == ry:
+            return False
+        # 内部処理的にはfind(y) -> find(x)へ辺を繋ぐ
+        w = self.op(self.op(self.diff_weight[x], self.inv(self.diff_weight[y])), self.inv(w))
+
+        if self.parents[rx] > self.parents[ry]:
+            rx, ry = ry, rx  # xの方が木のサイズが大きいようにする
+            w = self.inv(w)  # それに応じて結ぶ辺の向きも反転させる
+
+        self.parents[rx] += self.parents[ry]
+        self.parents[ry] = rx
+        self.diff_weight[ry] = w
+        return True
+
+    def weight(self, x):
+        """
+        xからxの属する木の根ノードまでの重みを求める
+        """
+        self.find(x)
+        return self.diff_weight[x] if self.parents[x] >= 0 else 0
+
+    def diff(self, x, y):
+        """
+        xからyへ向かうのにかかる重みを求める
+        """
+        return self.op(self.weight(x), self.inv(self.weight(y)))
+
+    def size(self, x):
+        """
+        xの属する木の要素数を返す
+        """
+        return -self.parents[self.find(x)]
+
+    def same(self, x, y):
+        """
+        xとyがpath-connectedかを判定する
+        """
+        return self.find(x) == self.find(y)
+
+    def union_many(self, xs, ys, ws):
+        """
+        i = 0, 1, ...の順にxs[i]からys[i]へ重みws[i]の辺を繋ぎ、それぞれで新たに繋いだかどうかをnp.bool_の配列で返す
+        Falseだった辺が矛盾しないかはdiff_manyで確かめられる
+        """
+        ret = np.empty(xs.shape[0], dtype=np.bool_)
+        for i in range(xs.shape[0]):
+            ret[i] = self.union(xs[i], ys[i], ws[i])
+        return ret
+
+    def diff_many(self, xs, ys):
+        """
+        xs[i]からys[i]へ向かうのにかかる重みを並べた配列を返す（path-connectedでない組の値は不定）
+        """
+        ret = np.empty(xs.shape[0], dtype=np.int64)
+        for i in range(xs.shape[0]):
+            ret[i] = self.diff(xs[i], ys[i])
+        return ret
+
+    def same_many(self, xs, ys):
+        """
+        xs[i]とys[i]がpath-connectedかをnp.bool_の配列で返す
+        """
+        return same_many(self, xs, ys)
+
+    ###### これ以降の操作はO(n)かかる ######
+
+    def weights(self):
+        """
+        各要素から根ノードまでの重みを並べた配列を返す
+        """
+        ret = np.empty(self.n, dtype=np.int64)
+        for i in range(self.n):
+            ret[i] = self.weight(i)
+        return ret
+
+    def labels(self):
+        """
+        連結成分に最小の要素が小さい順に0, 1, ...と番号を振り、各要素の属する連結成分の番号の配列を返す
+        """
+        return group_labels(self.parents)
+
+    def groups(self):
+        """
+        連結成分ごとの要素をCSR形式で返す
+        labels()の番号がjの連結成分の要素はmembers[offsets[j]:offsets[j + 1]]（昇順）
+        """
+        return group_members(self.labels())
+
+    def roots(self):
+        """
+        連結成分の代表元の配列を返す
+        """
+        return np.flatnonzero(self.parents < 0)
+
+    def group_count(self):
+        """
+        連結成分の個数を返す
+        """
+        return np.count_nonzero(self.parents < 0)